@@ -3,8 +3,10 @@
 # =========================================================
 import os
 import json
+import asyncio
+import tempfile
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import discord
 from discord.ext import commands, tasks
 
@@ -12,73 +14,99 @@ from modules.data_structures import TrendItem
 from modules.scoring import update_intent_score
 from modules.report import save_report
 from modules.movement import load_last_scores, compare_movement
-from modules.chart import make_chart
-from modules.sources.tiktok_loader import get_latest_trends
-from modules.sources.update_cache import update_local_cache
+from modules import chart, sentiment
+from modules.chart import make_chart, make_multi_chart
 from modules.database import init_db, save_trends
 from modules.analytics import get_top_movers
 from modules.insights import get_summary
+from modules.breakout import BreakoutDetector
+from modules.retention import run_retention
+from modules.backfill import backfill
+from modules.identity import canonicalize_history, duplicate_candidates, merge_items
+from modules.distribution import percentile_ranks
+from modules.sketches import surging_phrases, suggest_intent_phrases
+from modules.subscriptions import (
+    FEEDS, MAX_ITEMS, Subscription, subscribe as add_subscription, unsubscribe as remove_subscription,
+    list_subscriptions, group_by_filter,
+)
+from modules.delivery import SendScheduler
+from modules import pipeline
+from modules.leaderboard_queue import claim_next, latest as latest_leaderboard, mark_posted, release
+from modules.query_cache import QueryCache
+from modules.export import FORMATS as EXPORT_FORMATS, export_history, parse_range
+from modules.logs import log_run, setup_logging, stage
 
 # ---------------------------------------------------------
 #  Configuration
 # ---------------------------------------------------------
 TOKEN = os.getenv("DISCORD_TOKEN")
 CHANNEL_ID = 1435333379946975425  # ← replace with your real channel ID
+# "single": this process ingests, scores and posts (default)
+# "split":  worker.py does ingest/scoring; this process only posts its results
+MODE = os.getenv("TRENDINGBOT_MODE", "single")
+MAX_COMPARE = 8          # items per !compare chart
+OVERLAY_LIMIT = 4        # more items than this → small-multiples sheet
+SHEET_DAYS = 7           # history shown on the daily top-movers sheet
 
-# Logging setup
-logging.basicConfig(
-    filename="bot.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
+# Logging setup: queued, rotated JSON lines in bot.log (see modules/logs.py)
+setup_logging("bot.log")
 
 intents = discord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
+# in split mode worker.py owns data/breakout_state.json; the bot must never write it
+breakout_detector = BreakoutDetector.load() if MODE != "split" else None
+breakout_lock = asyncio.Lock()   # one update/save of the detector state at a time
+scheduler = SendScheduler(bot.get_channel)
+query_cache = QueryCache()
 
 # =========================================================
 #  Helper Function: build trends embed
 # =========================================================
-async def build_trends_embed():
-    """Load trend data via source loader, compute scores, and build an embed."""
+async def load_scored_items():
+    """Load trend data via source loader and compute scores off the event loop.
+
+    Returns (items sorted by score, error message or None).
+    """
+    return await asyncio.to_thread(pipeline.load_scored_items)
+
+
+def error_embed(message):
+    return discord.Embed(
+        title="⚠️ Error Loading Data",
+        description=message,
+        color=0xE74C3C,
+    )
+
+
+def rank_label(ranks, name):
+    """' · P93 overall · P80 own' from percentile_ranks() output ('' without data)."""
+    overall, own = ranks.get(name, (None, None))
+    label = f" · P{overall:.0f} overall" if overall is not None else ""
+    if own is not None:
+        label += f" · P{own:.0f} own"
+    return label
+
+
+async def load_ranks(pairs):
+    """Percentile ranks of (item_name, score) pairs, read off the event loop."""
     try:
-        update_local_cache()
+        return await asyncio.to_thread(percentile_ranks, pairs)
     except Exception as err:
-        logging.warning("Cache update failed: %s", err)
+        logging.warning("Percentile lookup failed: %s", err)
+        return {}
 
-    try:
-        raw_items = get_latest_trends()
-    except Exception as e:
-        logging.exception("Failed to load trend data: %s", e)
-        embed = discord.Embed(
-            title="⚠️ Error Loading Data",
-            description=str(e),
-            color=0xE74C3C,
-        )
-        return embed, []
 
-    items = []
-    for entry in raw_items:
-        try:
-            item = TrendItem(
-                item_name=entry.get("item_name", "Unknown Item"),
-                hashtags=entry.get("hashtags", []),
-                caption_texts=entry.get("caption_texts", []),
-                view_count=entry.get("view_count", 0),
-                like_count=entry.get("like_count", 0),
-                comment_count=entry.get("comment_count", 0),
-                share_count=entry.get("share_count", 0),
-                creator_followers=entry.get("creator_followers", 0),
-                post_time=datetime.now(),
-            )
-            update_intent_score(item)
-            items.append(item)
-        except Exception as err:
-            logging.warning("Skipping bad entry: %s", err)
+def render_trends_embed(items, movement_icons, min_score=0.0, max_items=None, ranks=None):
+    """Build the leaderboard embed for one subscription filter.
 
-    items.sort(key=lambda x: x.intent_score, reverse=True)
-    previous_scores = load_last_scores()
-    movement_icons = compare_movement(items, previous_scores)
+    <ranks> is percentile_ranks() output; the embed colour follows the top
+    item's percentile among all recorded scores.
+    """
+    ranks = ranks or {}
+    # rows saved before max_items was validated may hold anything
+    limit = MAX_ITEMS if max_items is None else max(1, min(max_items, MAX_ITEMS))
+    items = [item for item in items if item.intent_score >= min_score][:limit]
 
     embed = discord.Embed(
         title="📊 Top Trending Products",
@@ -93,23 +121,129 @@ async def build_trends_embed():
         embed.add_field(
             name=f"{medal} {item.item_name} {arrow}",
             value=(
-                f"💡 Score: {item.intent_score:.2f}\n"
+                f"💡 Score: {item.intent_score:.2f}{rank_label(ranks, item.item_name)}\n"
                 f"❤️ Likes: {item.like_count:,}  💬 Comments: {item.comment_count:,}"
             ),
             inline=False,
         )
 
-    top_score = items[0].intent_score if items else 0
-    if top_score > 8:
+    top_rank = ranks.get(items[0].item_name, (None, None))[0] if items else None
+    if top_rank is None:
+        embed.color = 0x00FF88     # no score history yet
+    elif top_rank >= 90:
         embed.color = 0x1ABC9C
-    elif top_score > 6:
+    elif top_rank >= 50:
         embed.color = 0xF1C40F
     else:
         embed.color = 0xE74C3C
 
     embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/4424/4424710.png")
     embed.set_footer(text=f"TrendingBot • Updated {datetime.now():%Y-%m-%d %H:%M}")
-    return embed, items
+    return embed
+
+
+async def build_trends_embed():
+    """Load trend data via source loader, compute scores, and build an embed."""
+    items, error = await load_scored_items()
+    if error:
+        return error_embed(error), []
+    movement_icons = compare_movement(items, await asyncio.to_thread(load_last_scores))
+    ranks = await load_ranks((item.item_name, item.intent_score) for item in items)
+    return render_trends_embed(items, movement_icons, ranks=ranks), items
+
+async def latest_queued_embed():
+    """Split mode: render the newest leaderboard worker.py queued."""
+    job = await asyncio.to_thread(latest_leaderboard)
+    if job is None:
+        return error_embed("The worker hasn't produced a leaderboard yet.")
+    items, movement_icons, _, error = job
+    if error:
+        return error_embed(error)
+    ranks = await load_ranks((item.item_name, item.intent_score) for item in items)
+    return render_trends_embed(items, movement_icons, ranks=ranks)
+
+# =========================================================
+#  Helper Functions: feed delivery and breakout alerts
+# =========================================================
+def feed_subscriptions(feed):
+    """Subscribers of <feed>; falls back to the legacy CHANNEL_ID if nobody subscribed."""
+    subs = list_subscriptions(feed)
+    if not subs and CHANNEL_ID:
+        subs = [Subscription(0, CHANNEL_ID, feed)]
+    return subs
+
+
+async def fan_out(feed, payload):
+    """Deliver one payload to every subscriber of <feed> and log the metrics."""
+    channel_ids = [sub.channel_id for sub in feed_subscriptions(feed)]
+    report = await scheduler.deliver(channel_ids, payload)
+    logging.info("Delivered %s feed: %s", feed, report.summary())
+    return report
+
+
+async def deliver_leaderboard(items, movement_icons, error=None):
+    """Render one embed per distinct hourly filter and deliver them all concurrently."""
+    groups = group_by_filter(feed_subscriptions("hourly"))
+    ranks = {} if error else await load_ranks((item.item_name, item.intent_score) for item in items)
+    deliveries = []
+    for (min_score, max_items), channel_ids in groups.items():
+        if error:
+            embed = error_embed(error)
+        else:
+            embed = render_trends_embed(items, movement_icons, min_score, max_items, ranks)
+        deliveries.append(scheduler.deliver(channel_ids, {"embed": embed}))
+    reports = await asyncio.gather(*deliveries)
+    logging.info(
+        "Auto-update sent to %d channels, %d failed (%d items, %d embeds).",
+        sum(r.sent for r in reports), sum(r.failed for r in reports),
+        len(items), len(reports),
+    )
+    return reports
+
+
+async def send_breakout_alerts(items):
+    """Feed the new snapshot to the breakout detector and alert on any hits."""
+    if breakout_detector is None:
+        return
+    try:
+        # updating and rewriting the state file is O(items); keep it off the event loop
+        async with breakout_lock:
+            hits = await asyncio.to_thread(_update_breakouts, items)
+    except Exception as err:
+        logging.warning("Breakout detection failed: %s", err)
+        return
+    await post_breakout_alerts(hits)
+
+
+def _update_breakouts(items):
+    hits = breakout_detector.update(items)
+    breakout_detector.save()
+    return hits
+
+
+async def post_breakout_alerts(hits):
+    """Send one alert embed listing the given breakouts."""
+    if not hits:
+        return
+
+    embed = discord.Embed(
+        title="🚨 Breakout Alert",
+        description="Items surging well above their smoothed baseline.",
+        color=0xFF4500,
+    )
+    ranks = await load_ranks((hit.item_name, hit.score) for hit in hits[:10])
+    for hit in hits[:10]:
+        embed.add_field(
+            name=f"🔥 {hit.item_name}",
+            value=(
+                f"💡 Score: {hit.score:.2f} (expected {hit.expected:.2f}){rank_label(ranks, hit.item_name)}\n"
+                f"📊 z = {hit.z_score:.1f}  ⚡ +{hit.velocity:.0%} vs baseline"
+            ),
+            inline=False,
+        )
+    embed.set_footer(text=f"TrendingBot • {datetime.now():%Y-%m-%d %H:%M}")
+    await fan_out("alerts", {"embed": embed})
+    logging.info("Breakout alert sent (%d items).", len(hits))
 
 # =========================================================
 #  Commands
@@ -150,10 +284,15 @@ async def trendtest(ctx):
 @bot.command()
 async def trends(ctx):
     """Generate, display, and save the latest leaderboard."""
+    if MODE == "split":
+        # worker.py owns ingest, persistence and the breakout state; just show its latest result
+        await ctx.send(embed=await latest_queued_embed())
+        return
     embed, items = await build_trends_embed()
     await ctx.send(embed=embed)
-    save_report(items)
-    save_trends(items)
+    await asyncio.to_thread(save_report, items)
+    await asyncio.to_thread(save_trends, items)
+    await send_breakout_alerts(items)
     logging.info("Manual !trends report saved (%d items).", len(items))
 
 
@@ -164,7 +303,9 @@ async def graph(ctx, *, item: str = None):
         await ctx.send("⚠️ Please include an item name, e.g. `!graph Mini Blender`")
         return
     try:
-        chart_path = make_chart(item)
+        chart_path = await query_cache.get(("graph", item.lower()), make_chart, item)
+        if chart_path and not os.path.exists(chart_path):
+            chart_path = await asyncio.to_thread(make_chart, item)
         if not chart_path:
             await ctx.send(f"❌ No history found for '{item}'.")
             return
@@ -175,10 +316,35 @@ async def graph(ctx, *, item: str = None):
         await ctx.send(f"⚠️ Failed to create chart for '{item}': {e}")
 
 
+
+@bot.command()
+async def compare(ctx, *, items: str = None):
+    """Chart several items in one figure: `!compare Mini Blender, LED Mirror, …`."""
+    names = list(dict.fromkeys(part.strip() for part in (items or "").split(",") if part.strip()))
+    if len(names) < 2 or len(names) > MAX_COMPARE:
+        await ctx.send(f"⚠️ Usage: `!compare item1, item2, …` (2–{MAX_COMPARE} items)")
+        return
+    layout = "grid" if len(names) > OVERLAY_LIMIT else "overlay"
+    key = ("compare", layout, tuple(name.lower() for name in names))
+    try:
+        chart_path, missing = await query_cache.get(key, make_multi_chart, names, layout)
+        if chart_path and not os.path.exists(chart_path):
+            chart_path, missing = await asyncio.to_thread(make_multi_chart, names, layout)
+        if not chart_path:
+            await ctx.send("❌ No history found for any of those items.")
+            return
+        note = f"⚠️ No history for: {', '.join(missing)}" if missing else None
+        await ctx.send(note, file=discord.File(chart_path))
+        logging.info("Sent comparison chart for %s", ", ".join(names))
+    except Exception as e:
+        logging.exception("Error in !compare command: %s", e)
+        await ctx.send(f"⚠️ Failed to create comparison chart: {e}")
+
+
 @bot.command()
 async def topmovers(ctx, hours: int = 24):
     """Show items with the largest score increase in the past N hours (default 24)."""
-    movers = get_top_movers(hours)
+    movers = await query_cache.get(("topmovers", hours), get_top_movers, hours)
     if not movers:
         await ctx.send("⚠️ Not enough data yet to calculate top movers.")
         return
@@ -204,7 +370,7 @@ async def topmovers(ctx, hours: int = 24):
 @bot.command()
 async def summary(ctx, hours: int = 24):
     """Provide a short summary for the last N hours (default 24)."""
-    data = get_summary(hours)
+    data = await query_cache.get(("summary", hours), get_summary, hours)
     if not data:
         await ctx.send("⚠️ Not enough data to summarize yet.")
         return
@@ -223,6 +389,160 @@ async def summary(ctx, hours: int = 24):
     await ctx.send(embed=embed)
 
 
+@bot.command()
+async def phrases(ctx, hours: int = 24):
+    """Show caption phrases surging over the last N hours (default 24)."""
+    # merges up to a week of hourly sketch files: keep it off the event loop
+    surging = await asyncio.to_thread(surging_phrases, hours)
+    if not surging:
+        await ctx.send("⚠️ Not enough caption data yet to spot surging phrases.")
+        return
+
+    embed = discord.Embed(
+        title=f"🔤 Surging Phrases (last {hours} h)",
+        color=0x9B59B6,
+        description="\n".join(
+            f"• **{phrase}** – ~{count:,} mentions (×{growth:.1f})"
+            for phrase, count, growth in surging
+        ),
+    )
+    suggestions = await asyncio.to_thread(suggest_intent_phrases)
+    if suggestions:
+        embed.add_field(
+            name="💡 Candidate intent phrases",
+            value=", ".join(f"`{phrase}`" for phrase, _ in suggestions[:5]),
+            inline=False,
+        )
+    embed.set_footer(text=f"TrendingBot • {datetime.now():%Y-%m-%d %H:%M}")
+    await ctx.send(embed=embed)
+
+
+@bot.command(name="export")
+@commands.guild_only()
+@commands.has_permissions(manage_guild=True)
+@commands.cooldown(1, 60, commands.BucketType.user)
+async def export_cmd(ctx, start: str = None, end: str = None, fmt: str = "csv"):
+    """Upload history for a date range as gzip'd CSV or NDJSON, e.g. `!export 2025-01-01 2025-01-31 ndjson`."""
+    if end in EXPORT_FORMATS:
+        end, fmt = None, end
+    try:
+        if not start or fmt not in EXPORT_FORMATS:
+            raise ValueError("usage: `!export YYYY-MM-DD [YYYY-MM-DD] [csv|ndjson]`")
+        start_ts, end_ts = parse_range(start, end)
+    except ValueError as e:
+        await ctx.send(f"⚠️ {e}")
+        return
+
+    # a private directory per call: concurrent exports of the same range
+    # never share (or delete) each other's file
+    with tempfile.TemporaryDirectory(prefix="export_") as out_dir:
+        try:
+            async with ctx.typing():
+                path, count = await asyncio.to_thread(
+                    export_history, start_ts, end_ts, fmt, out_dir=out_dir
+                )
+            if not count:
+                await ctx.send("⚠️ No history stored for that range.")
+                return
+            size = os.path.getsize(path)
+            if size > ctx.guild.filesize_limit:
+                await ctx.send(
+                    f"⚠️ Export is {size / 1e6:.1f} MB, over this server's upload limit. "
+                    f"Try a shorter range or `python -m modules.export {start_ts[:10]} ...` on the host."
+                )
+                return
+            await ctx.send(f"📦 {count:,} rows", file=discord.File(path))
+            logging.info("Exported %d rows (%s → %s, %s) for %s", count, start_ts, end_ts, fmt, ctx.author)
+        except Exception as e:
+            logging.exception("Error in !export command: %s", e)
+            await ctx.send(f"⚠️ Export failed: {e}")
+
+
+@export_cmd.error
+async def export_error(ctx, error):
+    if isinstance(error, commands.CommandOnCooldown):
+        await ctx.send(f"⏳ One export per minute, try again in {error.retry_after:.0f}s.")
+    elif isinstance(error, (commands.MissingPermissions, commands.NoPrivateMessage)):
+        await ctx.send("⚠️ `!export` needs the Manage Server permission on a server.")
+    else:
+        logging.error("Error in !export command: %s", error)
+
+
+@bot.command(name="subscribe")
+@commands.guild_only()
+@commands.has_permissions(manage_channels=True)
+async def subscribe_cmd(ctx, feed: str = "hourly", min_score: float = 0.0, max_items: int = 10):
+    """Subscribe this channel to a feed (hourly, daily, alerts) with optional filters."""
+    clamped = max(1, min(max_items, MAX_ITEMS))
+    note = f" (max items is limited to 1–{MAX_ITEMS})" if clamped != max_items else ""
+    max_items = clamped
+    try:
+        add_subscription(ctx.guild.id, ctx.channel.id, feed, min_score, max_items)
+    except ValueError as e:
+        await ctx.send(f"⚠️ {e}")
+        return
+    await ctx.send(
+        f"✅ This channel now receives the **{feed}** feed "
+        f"(min score {min_score:.2f}, up to {max_items} items){note}."
+    )
+
+
+@bot.command(name="unsubscribe")
+@commands.guild_only()
+@commands.has_permissions(manage_channels=True)
+async def unsubscribe_cmd(ctx, feed: str = None):
+    """Stop one feed (or all feeds) in this channel."""
+    removed = remove_subscription(ctx.channel.id, feed)
+    if removed:
+        await ctx.send(f"🔕 Unsubscribed from {feed or 'all feeds'}.")
+    else:
+        await ctx.send("⚠️ This channel had no matching subscription.")
+
+
+@bot.command(name="subscriptions")
+@commands.guild_only()
+async def subscriptions_cmd(ctx):
+    """List this server's feed subscriptions."""
+    subs = list_subscriptions(guild_id=ctx.guild.id)
+    if not subs:
+        await ctx.send(f"ℹ️ No subscriptions yet. Feeds: {', '.join(FEEDS)}")
+        return
+    lines = [
+        f"• <#{sub.channel_id}> – **{sub.feed}** (min {sub.min_score:.2f}, max {sub.max_items})"
+        for sub in subs
+    ]
+    await ctx.send("\n".join(lines))
+
+
+@bot.command()
+@commands.is_owner()   # rewrites history for every server, not just this one
+async def merge(ctx, *, names: str = None):
+    """Merge two items' identities: `!merge Mini Blendr, Mini Blender` (first into second)."""
+    parts = [part.strip() for part in (names or "").split(",")]
+    if len(parts) != 2 or not all(parts):
+        await ctx.send("⚠️ Usage: `!merge <duplicate name>, <name to keep>`")
+        return
+    try:
+        source, target, moved = await asyncio.to_thread(merge_items, *parts)
+    except ValueError as e:
+        await ctx.send(f"⚠️ {e}")
+        return
+    logging.info("Merged item '%s' into '%s' (%d rows) by %s", source, target, moved, ctx.author)
+    await ctx.send(f"🔗 Merged **{source}** into **{target}** ({moved:,} history rows moved).")
+
+
+@bot.command()
+@commands.is_owner()
+async def duplicates(ctx, limit: int = 10):
+    """List likely duplicate item names that `!merge` could fold together."""
+    pairs = await asyncio.to_thread(duplicate_candidates, limit)
+    if not pairs:
+        await ctx.send("✅ No likely duplicate items found.")
+        return
+    lines = [f"• {a} ≈ {b} ({similarity:.0%})" for a, b, similarity in pairs]
+    await ctx.send("🪪 **Possible duplicates**\n" + "\n".join(lines))
+
+
 @bot.command()
 async def daily(ctx):
     """Manually trigger the daily report (for testing)."""
@@ -235,49 +555,91 @@ async def daily(ctx):
 @bot.event
 async def on_ready():
     init_db()  # ensure trends.db and table exist
-    print(f"✅ {bot.user} is now running!")
-    logging.info("Bot started as %s", bot.user)
-    if not hourly_update.is_running():
+    logging.info("✅ Bot started as %s", bot.user)
+    if MODE == "split":
+        if not post_queued_leaderboards.is_running():
+            post_queued_leaderboards.start()
+    elif not hourly_update.is_running():
         hourly_update.start()
     if not daily_report.is_running():
         daily_report.start()
+    if not retention_job.is_running():
+        retention_job.start()
+    # Heavy libraries are imported lazily; load them now, off the event loop,
+    # so the first !graph / scoring run doesn't pay for it.
+    asyncio.create_task(prewarm_heavy_imports())
+
+
+async def prewarm_heavy_imports():
+    """Import matplotlib and the VADER lexicon in a worker thread."""
+    started = datetime.now()
+    for module in (sentiment, chart):
+        try:
+            await asyncio.to_thread(module.prewarm)
+        except Exception as e:
+            logging.warning("Prewarm of %s failed: %s", module.__name__, e)
+    logging.info("Prewarm finished in %.2fs", (datetime.now() - started).total_seconds())
 
 # =========================================================
 #  Background task – hourly leaderboard update
 # =========================================================
 @tasks.loop(hours=1)
 async def hourly_update():
-    """Post the latest trends every hour automatically."""
+    """Post the latest trends to every hourly subscriber automatically."""
     try:
-        channel = bot.get_channel(CHANNEL_ID)
-        if not channel:
-            logging.warning("Channel ID not found – auto‑update skipped.")
-            return
-
-        embed, items = await build_trends_embed()
-        await channel.send(embed=embed)
-        save_report(items)
-        save_trends(items)
-        logging.info("Auto‑update sent to %s (%d items).", channel.name, len(items))
+        with log_run("hourly"):
+            with stage("ingest_score") as timing:
+                items, error = await load_scored_items()
+                timing["items"] = len(items)
+            with stage("movement"):
+                movement_icons = compare_movement(items, await asyncio.to_thread(load_last_scores))
+            with stage("deliver"):
+                await deliver_leaderboard(items, movement_icons, error)
+            # disk and SQLite writes (incl. the score digests) stay off the event loop
+            with stage("save_report"):
+                await asyncio.to_thread(save_report, items)
+            with stage("save_trends"):
+                await asyncio.to_thread(save_trends, items)
+            with stage("breakouts"):
+                await send_breakout_alerts(items)
     except Exception as e:
         logging.exception("Error in hourly_update: %s", e)
 
+
+@tasks.loop(seconds=30)
+async def post_queued_leaderboards():
+    """Split mode: post whatever leaderboards worker.py has queued."""
+    try:
+        while True:
+            job = await asyncio.to_thread(claim_next)
+            if job is None:
+                return
+            job_id, items, movement_icons, hits, error = job
+            try:
+                reports = await deliver_leaderboard(items, movement_icons, error)
+                if reports and not any(r.sent for r in reports):
+                    raise RuntimeError("no channel accepted the leaderboard")
+            except BaseException:
+                # keep it queued: the next poll tries again
+                logging.warning("Queued leaderboard %d not delivered; will retry", job_id)
+                await asyncio.to_thread(release, job_id)
+                raise
+            await asyncio.to_thread(mark_posted, job_id)
+            await post_breakout_alerts(hits)
+    except Exception as e:
+        logging.exception("Error posting queued leaderboard: %s", e)
+
 # =========================================================
 #  Background task – daily report
 # =========================================================
 async def post_daily_report():
-    """Generate and send a daily summary embed."""
+    """Generate the daily summary embed once and send it to every daily subscriber."""
     try:
-        channel = bot.get_channel(CHANNEL_ID)
-        if not channel:
-            logging.warning("Channel ID not found – daily report skipped.")
-            return
-
         summary = get_summary(24)
         movers = get_top_movers(24)
 
         if not summary:
-            await channel.send("⚠️ Not enough data to produce today’s summary.")
+            await fan_out("daily", {"content": "⚠️ Not enough data to produce today’s summary."})
             return
 
         top_item, avg_score, total_items = summary
@@ -292,6 +654,7 @@ async def post_daily_report():
             ),
         )
 
+        sheet = None
         if movers:
             mover_lines = [f"• {name} (+{diff:.2f})" for name, diff, _ in movers[:5]]
             embed.add_field(
@@ -299,26 +662,84 @@ async def post_daily_report():
                 value="\n".join(mover_lines),
                 inline=False,
             )
+            sheet = await top_movers_sheet([name for name, _, _ in movers[:5]])
 
         embed.set_footer(
             text=f"TrendingBot • Daily Report • {datetime.now():%Y‑%m‑%d}"
         )
-        await channel.send(embed=embed)
-        logging.info("Daily report posted to %s", channel.name)
+        if sheet:
+            embed.set_image(url="attachment://top_movers.png")
+            # a factory, so every channel (and retry) gets its own open file
+            await fan_out("daily", lambda: {
+                "embed": embed, "file": discord.File(sheet, filename="top_movers.png"),
+            })
+        else:
+            await fan_out("daily", {"embed": embed})
+        logging.info("Daily report posted")
     except Exception as e:
         logging.exception("Error in daily report: %s", e)
 
 
+async def top_movers_sheet(names):
+    """Render the top movers' recent history as one small-multiples PNG, or None."""
+    start = (datetime.now() - timedelta(days=SHEET_DAYS)).isoformat(timespec="seconds")
+    out_path = os.path.join("data", "reports", f"top_movers_{datetime.now():%Y-%m-%d}.png")
+    try:
+        path, _ = await asyncio.to_thread(
+            make_multi_chart, names, "grid",
+            f"Top movers – last {SHEET_DAYS} days", start, out_path,
+        )
+        return path
+    except Exception as e:
+        logging.warning("Top movers sheet failed: %s", e)
+        return None
+
+
 @tasks.loop(hours=24)
 async def daily_report():
     """Automatically post the daily trending summary every 24h."""
-    await post_daily_report()
+    with log_run("daily"):
+        await post_daily_report()
+
+# =========================================================
+#  Background task – retention / downsampling
+# =========================================================
+@tasks.loop(hours=6)
+async def retention_job():
+    """Roll old rows into hourly/daily aggregates off the event loop."""
+    # each step fails on its own: a bad report CSV must not stop the roll-ups
+    with log_run("retention"):
+        # fold rows stored under other spellings onto canonical item names
+        # first: backfill skips runs by the (canonical) names already stored
+        try:
+            with stage("canonicalize"):
+                renamed = await asyncio.to_thread(canonicalize_history)
+            if renamed:
+                logging.info("Moved %d history rows onto canonical item names", renamed)
+        except Exception as e:
+            logging.exception("Error canonicalizing history: %s", e)
+
+        # pick up report CSVs whose rows never reached trends.db
+        try:
+            with stage("backfill"):
+                imported = await asyncio.to_thread(backfill, processes=1, progress=False)
+            if imported["inserted"]:
+                logging.info("Backfilled report CSVs: %s", imported)
+        except Exception as e:
+            logging.exception("Error backfilling report CSVs: %s", e)
+
+        try:
+            with stage("retention"):
+                stats = await asyncio.to_thread(run_retention)
+            logging.info("Retention pass finished: %s", stats)
+        except Exception as e:
+            logging.exception("Error in retention job: %s", e)
 
 # =========================================================
 #  Run the bot
 # =========================================================
-try:
-    bot.run(TOKEN)
-except Exception as e:
-    logging.exception("Bot failed to start: %s", e)
-    print("💥 Bot failed to start:", e)
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        bot.run(TOKEN)
+    except Exception as e:
+        logging.exception("💥 Bot failed to start: %s", e)
\ No newline at end of file
@@ -4,11 +4,15 @@
 # =========================================================
 from flask import Flask, render_template_string, send_file
 import sqlite3
+import sys
 from datetime import datetime
 from pathlib import Path
 import matplotlib.pyplot as plt
 import io
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # for modules/
+from modules.distribution import percentile_ranks
+
 DB_PATH = Path("../data/trends.db")
 app = Flask(__name__)
 
@@ -29,9 +33,10 @@ th { background: #222; }
 <h1>Daily Trending Report ({{date}})</h1>
 <h2>Top Items</h2>
 <table>
-<tr><th>Rank</th><th>Item</th><th>Score</th></tr>
+<tr><th>Rank</th><th>Item</th><th>Score</th><th>Percentile</th></tr>
 {% for i, row in enumerate(rows, start=1) %}
-  <tr><td>{{i}}</td><td>{{row[0]}}</td><td>{{"%.2f"|format(row[1])}}</td></tr>
+  <tr><td>{{i}}</td><td>{{row[0]}}</td><td>{{"%.2f"|format(row[1])}}</td>
+      <td>{% if ranks[row[0]][0] is not none %}P{{"%.0f"|format(ranks[row[0]][0])}}{% endif %}</td></tr>
 {% endfor %}
 </table>
 <p>Generated {{date}}</p>
@@ -48,9 +53,11 @@ def index():
         "SELECT item_name, AVG(score) FROM trends "
         "GROUP BY item_name ORDER BY AVG(score) DESC LIMIT 10;"
     )
-    rows = cur.fetchall()
+    rows = list(cur)   # at most 10 rows
     con.close()
-    return render_template_string(HTML, rows=rows, date=datetime.now().strftime("%Y-%m-%d %H:%M"))
+    ranks = percentile_ranks(rows, db_path=DB_PATH)
+    return render_template_string(HTML, rows=rows, ranks=ranks,
+                                  date=datetime.now().strftime("%Y-%m-%d %H:%M"))
 
 @app.route("/chart/<item>")
 def chart(item):
@@ -60,15 +67,16 @@ def chart(item):
         "SELECT timestamp, score FROM trends WHERE item_name=? ORDER BY timestamp ASC",
         (item,),
     )
-    data = cur.fetchall()
+    # stream the cursor straight into the two plot series
+    times, scores = [], []
+    for t, s in cur:
+        times.append(t)
+        scores.append(s)
     con.close()
 
-    if not data:
+    if not times:
         return "No data", 404
 
-    times = [t for t, _ in data]
-    scores = [s for _, s in data]
-
     fig, ax = plt.subplots(figsize=(6,3))
     ax.plot(times, scores, color="#00ff88", marker="o")
     ax.set_title(f"{item} Trend")
@@ -2,10 +2,11 @@
 # modules/analytics.py
 # Utilities that read the SQLite DB for deeper insights
 # =========================================================
-import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from modules.database import iter_rows
+
 DB_PATH = Path("data/trends.db")
 
 def get_top_movers(hours: int = 24, limit: int = 5):
@@ -16,35 +17,32 @@ def get_top_movers(hours: int = 24, limit: int = 5):
     if not DB_PATH.exists():
         return []
 
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
     cutoff = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="seconds")
 
-    cur.execute(
-        "SELECT item_name, timestamp, score FROM trends WHERE timestamp >= ? ORDER BY timestamp ASC",
+    # Split each item's rows into an older and a newer half inside SQLite,
+    # so only one summary row per item ever reaches Python.
+    rows = iter_rows(
+        """
+        SELECT item_name,
+               AVG(CASE WHEN pos <= total / 2 THEN score END),
+               AVG(CASE WHEN pos > total / 2 THEN score END)
+        FROM (
+            SELECT item_name, score,
+                   ROW_NUMBER() OVER (PARTITION BY item_name ORDER BY timestamp, id) AS pos,
+                   COUNT(*) OVER (PARTITION BY item_name) AS total
+            FROM trends WHERE timestamp >= ?
+        )
+        GROUP BY item_name HAVING COUNT(*) >= 2
+        """,
         (cutoff,),
+        db_path=DB_PATH,
     )
-    rows = cur.fetchall()
-    conn.close()
-
-    if not rows:
-        return []
-
-    # Organize by item
-    data = {}
-    for name, ts, score in rows:
-        data.setdefault(name, []).append(score)
 
     results = []
-    for name, scores in data.items():
-        if len(scores) < 2:
-            continue
-        mid = len(scores) // 2
-        first_half = sum(scores[:mid]) / max(1, len(scores[:mid]))
-        second_half = sum(scores[mid:]) / max(1, len(scores[mid:]))
+    for name, first_half, second_half in rows:
         change = round(second_half - first_half, 2)
         results.append((name, change, second_half))
 
     # Sort by biggest positive change
     results.sort(key=lambda x: x[1], reverse=True)
-    return results[:limit]
\ No newline at end of file
+    return results[:limit]
@@ -0,0 +1,195 @@
+# =========================================================
+# modules/backfill.py
+# Imports legacy data/reports/trends_*.csv leaderboards into SQLite
+#
+#   python -m modules.backfill                 # all CPUs
+#   python -m modules.backfill --processes 2
+# Safe to re-run or interrupt: imported files are recorded in the
+# same transaction as their rows, so the next run picks up where
+# the last one stopped and never inserts a snapshot twice.
+# =========================================================
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from modules.database import DB_PATH, bump_generation, init_db
+from modules.distribution import record_scores
+from modules.identity import identity_key, resolve_names
+
+REPORT_DIR = Path("data/reports")
+BATCH_FILES = 500       # report files committed per transaction
+MATCH_SECONDS = 5       # save_report / save_trends stamp the same run a moment apart
+SETTLE_SECONDS = 600    # leave fresh reports alone until their save_trends has run
+
+
+def report_time(path: Path):
+    """Timestamp encoded in a report filename (trends_YYYY-MM-DD_HH-MM-SS.csv), or None."""
+    try:
+        return datetime.strptime(path.stem.split("_", 1)[1], "%Y-%m-%d_%H-%M-%S")
+    except (IndexError, ValueError):
+        return None
+
+
+def parse_report(path):
+    """
+    Read one report CSV in a worker process.
+    Returns (filename, iso_timestamp, [(item, score, likes, comments)]);
+    the timestamp is None for files that can't be imported. Rows with
+    missing columns are skipped.
+    """
+    path = Path(path)
+    when = report_time(path)
+    if when is None:
+        return path.name, None, []
+    rows = []
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if None in row.values():
+                    continue   # truncated line (e.g. the report was cut off mid-write)
+                rows.append((
+                    row["Item"].strip(),
+                    float(row["IntentScore"]),
+                    int(float(row.get("Likes") or 0)),
+                    int(float(row.get("Comments") or 0)),
+                ))
+    except (OSError, KeyError, ValueError, csv.Error):
+        return path.name, None, []
+    return path.name, when.isoformat(timespec="seconds"), rows
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS imported_reports (
+            filename TEXT PRIMARY KEY,
+            timestamp TEXT,
+            inserted INTEGER,
+            skipped INTEGER
+        )
+    """)
+    return conn
+
+
+def _present_items(conn, ts):
+    """
+    Identity keys of the items the DB already holds for the run at <ts>
+    (raw rows or rolled-up buckets), so rows still stored under another
+    spelling count as present.
+    """
+    when = datetime.fromisoformat(ts)
+    low = (when - timedelta(seconds=MATCH_SECONDS)).isoformat(timespec="seconds")
+    high = (when + timedelta(seconds=MATCH_SECONDS)).isoformat(timespec="seconds")
+    rows = conn.execute(
+        "SELECT item_name FROM trends WHERE timestamp BETWEEN ? AND ? "
+        "UNION SELECT item_name FROM trends_hourly WHERE bucket = ? "
+        "UNION SELECT item_name FROM trends_daily WHERE bucket = ?",
+        (low, high, f"{ts[:13]}:00:00", f"{ts[:10]}T00:00:00"),
+    )
+    return {identity_key(name) for (name,) in rows}
+
+
+def _write_batch(conn, parsed):
+    """Insert one batch of parsed reports and mark them imported, atomically."""
+    inserted = skipped = 0
+    scored = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for filename, ts, rows in parsed:
+            new_rows = []
+            if ts is not None:
+                present = _present_items(conn, ts)
+                new_rows = [(ts, *row) for row in rows if identity_key(row[0]) not in present]
+                conn.executemany(
+                    "INSERT INTO trends (timestamp, item_name, score, likes, comments) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    new_rows,
+                )
+                scored.extend((row[1], row[2]) for row in new_rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO imported_reports VALUES (?, ?, ?, ?)",
+                (filename, ts, len(new_rows), len(rows) - len(new_rows)),
+            )
+            inserted += len(new_rows)
+            skipped += len(rows) - len(new_rows)
+        record_scores(conn, scored)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return inserted, skipped
+
+
+def backfill(report_dir=REPORT_DIR, processes=None, progress=True):
+    """
+    Import every report CSV not yet recorded in imported_reports.
+    Files are parsed in a process pool; rows whose run is already in the
+    DB are skipped. Returns counts of files, inserted and skipped rows.
+    """
+    init_db()
+    conn = _connect()
+    done = {name for (name,) in conn.execute("SELECT filename FROM imported_reports")}
+    settled = time.time() - SETTLE_SECONDS
+    files = [
+        str(p) for p in sorted(Path(report_dir).glob("trends_*.csv"))
+        if p.name not in done and p.stat().st_mtime < settled
+    ]
+    stats = {"files": 0, "inserted": 0, "skipped": 0, "unreadable": 0}
+    if not files:
+        conn.close()
+        return stats
+
+    started = time.monotonic()
+    processes = processes or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(processes) if processes > 1 else None
+    try:
+        parsed_files = pool.map(parse_report, files, chunksize=64) if pool else map(parse_report, files)
+        batch = []
+        for parsed in parsed_files:
+            batch.append(parsed)
+            stats["unreadable"] += parsed[1] is None
+            if len(batch) >= BATCH_FILES:
+                _apply(conn, batch, stats, started, len(files), progress)
+                batch = []
+        if batch:
+            _apply(conn, batch, stats, started, len(files), progress)
+    finally:
+        if pool:
+            pool.shutdown()
+        conn.close()
+
+    if stats["inserted"]:
+        bump_generation()
+    return stats
+
+
+def _apply(conn, batch, stats, started, total, progress):
+    # store history under canonical item names, like live ingests
+    names = resolve_names(row[0] for _, _, rows in batch for row in rows)
+    batch = [(filename, ts, [(names[row[0]], *row[1:]) for row in rows])
+             for filename, ts, rows in batch]
+    inserted, skipped = _write_batch(conn, batch)
+    stats["files"] += len(batch)
+    stats["inserted"] += inserted
+    stats["skipped"] += skipped
+    if progress:
+        rate = stats["files"] / max(time.monotonic() - started, 1e-9)
+        print(f"📥 {stats['files']:,}/{total:,} files, {stats['inserted']:,} rows "
+              f"({rate:,.0f} files/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill report CSVs into trends.db")
+    parser.add_argument("--reports", default=str(REPORT_DIR), help="directory of trends_*.csv")
+    parser.add_argument("--processes", type=int, default=None, help="parser processes")
+    args = parser.parse_args()
+    print("✅ Backfill finished:", backfill(args.reports, args.processes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# =========================================================
+# modules/breakout.py
+# Constant-state streaming breakout detection per item
+# =========================================================
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+STATE_PATH = Path("data/breakout_state.json")
+
+# ---------------------------------------------------------
+#  Tuning (overridable from data/config.json)
+# ---------------------------------------------------------
+try:
+    with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+        BREAKOUT_Z = cfg.get("BREAKOUT_Z", 3.0)
+        BREAKOUT_VELOCITY = cfg.get("BREAKOUT_VELOCITY", 0.5)
+        BREAKOUT_COOLDOWN_HOURS = cfg.get("BREAKOUT_COOLDOWN_HOURS", 6)
+except Exception:
+    BREAKOUT_Z = 3.0                # residual z-score that counts as a breakout
+    BREAKOUT_VELOCITY = 0.5         # or a +50 % jump over the smoothed level
+    BREAKOUT_COOLDOWN_HOURS = 6     # minimum gap between alerts for one item
+
+ALPHA = 0.3      # level smoothing
+BETA = 0.1       # trend smoothing
+GAMMA = 0.1      # residual variance smoothing
+WARMUP = 3       # observations required before an item may alert
+MIN_STD = 0.25   # floor so a perfectly flat series doesn't give infinite z
+
+# state layout per item: [level, trend, variance, count, last_alert_epoch]
+_LEVEL, _TREND, _VAR, _COUNT, _ALERTED = range(5)
+
+
+@dataclass
+class Breakout:
+    """One item that just broke out of its recent behaviour."""
+    item_name: str
+    score: float
+    expected: float
+    z_score: float
+    velocity: float   # relative jump over the smoothed level
+
+
+class BreakoutDetector:
+    """
+    Holt-style EWMA level/trend plus EWMA residual variance per item.
+    Each update is O(1) per item and never touches the trends history.
+    """
+
+    def __init__(self, state=None):
+        self.state = state or {}
+
+    # -----------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------
+    @classmethod
+    def load(cls, path: Path = STATE_PATH) -> "BreakoutDetector":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logging.warning("⚠️ Failed to read breakout state: %s", e)
+            return cls()
+
+    def save(self, path: Path = STATE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, separators=(",", ":"))
+        tmp.replace(path)
+
+    # -----------------------------------------------------
+    # Streaming update
+    # -----------------------------------------------------
+    def observe(self, item_name: str, score: float, now: float = None):
+        """Fold one score into the item's state; return a Breakout or None."""
+        now = time.time() if now is None else now
+        s = self.state.get(item_name)
+        if s is None:
+            self.state[item_name] = [score, 0.0, 0.0, 1, 0.0]
+            return None
+
+        level, trend, var = s[_LEVEL], s[_TREND], s[_VAR]
+        expected = level + trend
+        resid = score - expected
+        z = resid / max(math.sqrt(var), MIN_STD)
+        velocity = (score - level) / max(abs(level), 1.0)
+
+        new_level = ALPHA * score + (1 - ALPHA) * expected
+        s[_TREND] = BETA * (new_level - level) + (1 - BETA) * trend
+        s[_LEVEL] = new_level
+        s[_VAR] = (1 - GAMMA) * var + GAMMA * resid * resid
+        s[_COUNT] += 1
+
+        if s[_COUNT] <= WARMUP:
+            return None
+        if z < BREAKOUT_Z and velocity < BREAKOUT_VELOCITY:
+            return None
+        if s[_ALERTED] and now - s[_ALERTED] < BREAKOUT_COOLDOWN_HOURS * 3600:
+            return None
+
+        s[_ALERTED] = now
+        return Breakout(item_name, score, round(expected, 2), round(z, 2), round(velocity, 2))
+
+    def update(self, items, now: float = None):
+        """Observe a whole snapshot of TrendItems; return breakouts, strongest first."""
+        now = time.time() if now is None else now
+        observe = self.observe
+        breakouts = []
+        for item in items:
+            hit = observe(item.item_name, item.intent_score, now)
+            if hit:
+                breakouts.append(hit)
+        breakouts.sort(key=lambda b: b.z_score, reverse=True)
+        return breakouts
+
+# =========================================================
+#  Stand‑alone test  →  python ‑m modules.breakout
+# =========================================================
+if __name__ == "__main__":
+    detector = BreakoutDetector()
+    series = [5.0, 5.2, 4.9, 5.1, 5.0, 9.5, 9.8]
+    for hour, value in enumerate(series):
+        hit = detector.observe("Mini Blender", value, now=1_700_000_000 + hour * 3600)
+        print(f"hour {hour}: score {value:.1f} → {hit}")
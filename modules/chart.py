@@ -1,50 +1,172 @@
 # =========================================================
 # modules/chart.py
-# Generates trend line charts from report CSVs
+# Generates trend line charts from the trends database
 # =========================================================
-import csv
+import hashlib
+import math
 from datetime import datetime
 from pathlib import Path
-import matplotlib.pyplot as plt
 
-def get_history(item_name: str):
-    """Return two lists: datetimes and scores for the given item."""
-    report_dir = Path("data/reports")
-    if not report_dir.exists():
-        return [], []
+from modules.database import DB_PATH, iter_history
+from modules.identity import canonical_name, identity_key
 
-    times, scores = [], []
+CHART_DIR = Path("data/reports")
+MAX_POINTS = 300        # points per series after LTTB downsampling
+COLORS = ["#00ff88", "#3498db", "#e67e22", "#9b59b6", "#e74c3c",
+          "#1abc9c", "#f1c40f", "#95a5a6"]
+
+_Figure = None
+
+
+def _figure(**kwargs):
+    """
+    A new standalone matplotlib Figure (imported on first use).
+    Charts render in worker threads, so they never touch pyplot's global
+    "current figure" state, which concurrent renders would share.
+    """
+    global _Figure
+    if _Figure is None:
+        from matplotlib.figure import Figure
+        _Figure = Figure
+    return _Figure(**kwargs)
 
-    for file in sorted(report_dir.glob("trends_*.csv")):
-        try:
-            file_time = datetime.strptime(file.stem.split("_", 1)[1], "%Y-%m-%d_%H-%M-%S")
-        except Exception:
-            continue
-
-        with open(file, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row["Item"].strip().lower() == item_name.lower():
-                    times.append(file_time)
-                    scores.append(float(row["IntentScore"]))
+
+def prewarm():
+    """Load matplotlib ahead of the first !graph (call from a worker thread)."""
+    _figure()
+
+
+def get_history(item_name: str):
+    """Return two lists: datetimes and scores for the given item (any spelling)."""
+    times, scores = [], []
+    if not DB_PATH.exists():
+        return times, scores
+    for row in iter_history(item_name=canonical_name(item_name) or item_name):
+        times.append(datetime.fromisoformat(row[0]))
+        scores.append(row[2])
     return times, scores
 
 
 def make_chart(item_name: str) -> str:
     """Create a chart and return the filename."""
-    x, y = get_history(item_name)
+    name = canonical_name(item_name) or item_name
+    x, y = get_history(name)
     if not x:
         return None
 
-    plt.figure(figsize=(6, 3))
-    plt.plot(x, y, marker="o", color="#00ff88")
-    plt.title(f"{item_name} Trend Over Time")
-    plt.xlabel("Timestamp")
-    plt.ylabel("Intent Score")
-    plt.grid(True)
-    plt.tight_layout()
-
-    out_path = Path("data/reports") / f"{item_name.replace(' ', '_')}_trend.png"
-    plt.savefig(out_path)
-    plt.close()
-    return str(out_path)
\ No newline at end of file
+    fig = _figure(figsize=(6, 3))
+    ax = fig.subplots()
+    ax.plot(x, y, marker="o", color="#00ff88")
+    ax.set_title(f"{name} Trend Over Time")
+    ax.set_xlabel("Timestamp")
+    ax.set_ylabel("Intent Score")
+    ax.grid(True)
+    fig.tight_layout()
+
+    # never a path from user input: only word characters plus a hash of the name
+    digest = hashlib.blake2b(name.encode(), digest_size=6).hexdigest()
+    out_path = CHART_DIR / f"{identity_key(name)[:40]}_{digest}_trend.png"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out_path)
+    return str(out_path)
+
+
+# ---------------------------------------------------------
+#  Multi-item charts: one history query, one figure
+# ---------------------------------------------------------
+def get_histories(item_names, start=None):
+    """
+    {canonical name: (datetimes, scores)} for several items (any spelling),
+    read with a single query. Items without history are left out.
+    """
+    series = {canonical_name(name) or name: ([], []) for name in item_names}
+    if not DB_PATH.exists() or not series:
+        return {}
+    for row in iter_history(start=start, item_names=series):
+        times, scores = series[row[1]]
+        times.append(datetime.fromisoformat(row[0]))
+        scores.append(row[2])
+    return {name: xy for name, xy in series.items() if xy[0]}
+
+
+def lttb(times, values, threshold=MAX_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keep the first and last
+    point plus, from each of <threshold>-2 buckets, the point forming the
+    largest triangle with its neighbours, so peaks and dips survive.
+    """
+    n = len(times)
+    if threshold >= n or threshold < 3:
+        return times, values
+    xs = [t.timestamp() for t in times]
+    every = (n - 2) / (threshold - 2)
+    keep = [0]
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        span = next_hi - next_lo
+        avg_x = sum(xs[next_lo:next_hi]) / span
+        avg_y = sum(values[next_lo:next_hi]) / span
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((xs[a] - avg_x) * (values[j] - values[a])
+                       - (xs[a] - xs[j]) * (avg_y - values[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return [times[i] for i in keep], [values[i] for i in keep]
+
+
+def make_multi_chart(item_names, layout="overlay", title=None, start=None, out_path=None):
+    """
+    Plot several items in one figure: "overlay" draws every series on one
+    axis, "grid" draws a small-multiples sheet. Histories come from one
+    query and are LTTB-downsampled to MAX_POINTS each.
+    Returns (filename or None, names without history).
+    """
+    canonical = {name: canonical_name(name) or name for name in item_names}
+    histories = get_histories(canonical.values(), start)
+    missing = [name for name, key in canonical.items() if key not in histories]
+    if not histories:
+        return None, missing
+
+    if layout == "grid":
+        cols = min(len(histories), 3 if len(histories) > 4 else 2)
+        rows = math.ceil(len(histories) / cols)
+        fig = _figure(figsize=(4 * cols, 2.6 * rows))
+        axes = fig.subplots(rows, cols, sharex=True, squeeze=False)
+        axes = [ax for row in axes for ax in row]
+        for i in range(len(histories), len(axes)):
+            axes[i].set_visible(False)
+            axes[i - cols].xaxis.set_tick_params(labelbottom=True)   # now bottom of its column
+    else:
+        fig = _figure(figsize=(8, 4))
+        axes = [fig.subplots()] * len(histories)
+
+    for i, (ax, (name, (x, y))) in enumerate(zip(axes, histories.items())):
+        x, y = lttb(x, y)
+        ax.plot(x, y, color=COLORS[i % len(COLORS)], label=name,
+                marker="o" if len(x) < 30 else None, markersize=3)
+        ax.grid(True)
+        if layout == "grid":
+            ax.set_title(name, fontsize=9)
+    if layout == "grid":
+        for ax in axes:
+            ax.tick_params(labelsize=7)
+    else:
+        axes[0].legend(fontsize=8)
+        axes[0].set_xlabel("Timestamp")
+        axes[0].set_ylabel("Intent Score")
+    fig.suptitle(title or " vs ".join(histories))
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+    if out_path is None:
+        digest = hashlib.blake2b("\x00".join(histories).encode(), digest_size=6).hexdigest()
+        out_path = CHART_DIR / f"compare_{layout}_{digest}.png"
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out_path)
+    return str(out_path), missing
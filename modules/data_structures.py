@@ -60,4 +60,21 @@ class TrendItem:
             "creator_followers": self.creator_followers,
             "post_time": self.post_time.isoformat(),
             "intent_score": self.intent_score,
-        }
\ No newline at end of file
+        }
+
+# =========================================================
+#  Stand‑alone test  →  python ‑m modules.data_structures
+# =========================================================
+if __name__ == "__main__":
+    t = TrendItem(
+        item_name="Mini Blender",
+        hashtags=["#TikTokMadeMeBuyIt"],
+        caption_texts=["Need this! Buying now!"],
+        view_count=54000,
+        like_count=7300,
+        comment_count=480,
+        share_count=210,
+        creator_followers=12000,
+        post_time=datetime.now()
+    )
+    print(t.summary())
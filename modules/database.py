@@ -8,10 +8,17 @@ from pathlib import Path
 
 DB_PATH = Path("data/trends.db")
 
+# Older data is rolled up into these by modules/retention.py;
+# the average score of a bucket is score_sum / samples.
+AGGREGATE_TABLES = ("trends_hourly", "trends_daily")
+
 def init_db():
     """Create database and table if they don't exist."""
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
+    # Only takes effect while the file is still empty; older databases are
+    # converted once with `python -m modules.retention --enable-incremental-vacuum`.
+    cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
     cur.execute("""
         CREATE TABLE IF NOT EXISTS trends (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -22,6 +29,26 @@ def init_db():
             comments INTEGER
         )
     """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_trends_timestamp ON trends (timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_trends_item ON trends (item_name, timestamp)")
+    for table in AGGREGATE_TABLES:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                score_sum REAL,
+                score_min REAL,
+                score_max REAL,
+                likes INTEGER,
+                comments INTEGER,
+                samples INTEGER,
+                PRIMARY KEY (bucket, item_name)
+            )
+        """)
+        # per-item history reads (charts, exports) would otherwise scan by bucket
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_item ON {table} (item_name, bucket)")
+    # WAL lets the dashboard and commands read while retention/bot write
+    cur.execute("PRAGMA journal_mode=WAL")
     conn.commit()
     conn.close()
 
@@ -36,18 +63,127 @@ def save_trends(items):
             "INSERT INTO trends (timestamp, item_name, score, likes, comments) VALUES (?, ?, ?, ?, ?)",
             (ts, item.item_name, item.intent_score, item.like_count, item.comment_count),
         )
+    from modules.distribution import record_scores  # distribution builds on this module
+
+    record_scores(conn, [(item.item_name, item.intent_score) for item in items])
+    _bump_generation(cur)
     conn.commit()
     conn.close()
 
 
-def query_item_history(item_name):
-    """Return [(timestamp, score)] for charting or analysis."""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+# ---------------------------------------------------------
+#  Snapshot generation – bumped on every write so readers
+#  (e.g. modules/query_cache.py) know when cached answers expire
+# ---------------------------------------------------------
+def _bump_generation(cur):
+    cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
     cur.execute(
-        "SELECT timestamp, score FROM trends WHERE item_name=? ORDER BY timestamp ASC",
-        (item_name,),
+        "INSERT INTO meta (key, value) VALUES ('snapshot_generation', 1) "
+        "ON CONFLICT(key) DO UPDATE SET value = value + 1"
     )
-    results = cur.fetchall()
+
+
+def bump_generation():
+    """Mark that a new snapshot was written outside save_trends (e.g. a CSV report)."""
+    conn = sqlite3.connect(DB_PATH)
+    _bump_generation(conn.cursor())
+    conn.commit()
     conn.close()
-    return results
\ No newline at end of file
+
+
+def get_generation() -> int:
+    """Return the current snapshot generation (0 before the first write)."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute(
+            "SELECT value FROM meta WHERE key='snapshot_generation'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    return row[0] if row else 0
+
+
+# ---------------------------------------------------------
+#  Streaming reads – rows come off the cursor in fixed-size
+#  blocks, so callers never hold a whole result set in memory
+# ---------------------------------------------------------
+BLOCK_ROWS = 1000
+
+
+def iter_blocks(sql, params=(), block_size=BLOCK_ROWS, db_path=None):
+    """Yield lists of at most <block_size> rows for a read-only query."""
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            block = cur.fetchmany(block_size)
+            if not block:
+                break
+            yield block
+    finally:
+        conn.close()
+
+
+def iter_rows(sql, params=(), block_size=BLOCK_ROWS, db_path=None):
+    """Yield rows of a read-only query one at a time (fetched in blocks)."""
+    for block in iter_blocks(sql, params, block_size, db_path):
+        yield from block
+
+
+HISTORY_COLUMNS = ("timestamp", "item_name", "score", "likes", "comments", "samples", "resolution")
+
+
+def iter_history(start=None, end=None, item_name=None, block_size=BLOCK_ROWS, item_names=None):
+    """
+    Stream every stored snapshot between <start> and <end> (ISO strings,
+    end exclusive) in time order as HISTORY_COLUMNS tuples: daily and
+    hourly aggregates left by the retention job plus the raw rows.
+    <item_names> restricts the stream to several items in the same query.
+    """
+    where, params = [], []
+    if start:
+        where.append("{ts} >= ?")
+        params.append(start)
+    if end:
+        where.append("{ts} < ?")
+        params.append(end)
+    if item_name:
+        where.append("item_name = ?")
+        params.append(item_name)
+    if item_names:
+        item_names = list(item_names)
+        where.append(f"item_name IN ({','.join('?' * len(item_names))})")
+        params.extend(item_names)
+    clause = (" WHERE " + " AND ".join(where)) if where else ""
+
+    parts = [
+        f"SELECT bucket, item_name, score_sum / samples, likes, comments, samples, '{table.split('_')[1]}' "
+        f"FROM {table}" + clause.format(ts="bucket")
+        for table in reversed(AGGREGATE_TABLES)
+    ]
+    parts.append(
+        "SELECT timestamp, item_name, score, likes, comments, 1, 'raw' FROM trends"
+        + clause.format(ts="timestamp")
+    )
+    sql = " UNION ALL ".join(parts) + " ORDER BY 1, 2"
+    return iter_rows(sql, params * len(parts), block_size)
+
+
+def iter_item_history(item_name, block_size=BLOCK_ROWS):
+    """Stream (timestamp, score) pairs for one item, oldest first."""
+    for row in iter_history(item_name=item_name, block_size=block_size):
+        yield row[0], row[2]
+
+
+def query_item_history(item_name):
+    """Return [(timestamp, score)] for charting or analysis.
+
+    Raw rows are combined with the hourly/daily aggregates left behind by
+    the retention job, so long histories stay complete after downsampling.
+    Any spelling of the item works; history is stored under its canonical name.
+    """
+    from modules.identity import canonical_name  # identity builds on this module
+
+    return list(iter_item_history(canonical_name(item_name) or item_name))
@@ -0,0 +1,186 @@
+# =========================================================
+# modules/delivery.py
+# Concurrent, rate-limit-aware fan-out of messages to channels
+# =========================================================
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+# Discord allows roughly 5 messages / 5 s per channel and 50 requests / s
+# per bot globally. Buckets start from these and back off on 429s.
+ROUTE_LIMIT = (5, 5.0)
+GLOBAL_LIMIT = (50, 1.0)
+MAX_RETRIES = 3
+CONCURRENCY = 25
+
+
+class TokenBucket:
+    """Classic token bucket with an extra hard block for server-sent retry_after."""
+
+    def __init__(self, capacity: int, per_seconds: float, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = self.clock()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class DeliveryReport:
+    """Outcome of one fan-out."""
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    elapsed: float = 0.0
+    latencies: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)   # channel_id → last error text
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self) -> str:
+        return (
+            f"sent {self.sent}, failed {self.failed}, retries {self.retries}, "
+            f"429s {self.rate_limited}, {self.elapsed:.2f}s total, "
+            f"p50 {self.percentile(50) * 1000:.0f} ms, p95 {self.percentile(95) * 1000:.0f} ms"
+        )
+
+
+def _retry_after(err):
+    """Seconds to wait if <err> is a rate limit, else None."""
+    retry_after = getattr(err, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    if getattr(err, "status", None) == 429:
+        return 1.0
+    return None
+
+
+def _is_permanent(err):
+    # 403 Forbidden / 404 Unknown Channel won't fix themselves on retry
+    return getattr(err, "status", None) in (401, 403, 404)
+
+
+class SendScheduler:
+    """
+    Deliver one payload to many channels concurrently.
+    <get_channel> is any callable mapping a channel id to an object with an
+    async send(**kwargs) — the bot's get_channel in production, a fake in tests.
+    """
+
+    def __init__(self, get_channel, concurrency=CONCURRENCY, route_limit=ROUTE_LIMIT,
+                 global_limit=GLOBAL_LIMIT, max_retries=MAX_RETRIES):
+        self.get_channel = get_channel
+        self.concurrency = concurrency
+        self.route_limit = route_limit
+        self.max_retries = max_retries
+        self.global_bucket = TokenBucket(*global_limit)
+        self.routes = {}
+        self.totals = DeliveryReport()
+
+    def _route(self, channel_id):
+        bucket = self.routes.get(channel_id)
+        if bucket is None:
+            bucket = self.routes[channel_id] = TokenBucket(*self.route_limit)
+        return bucket
+
+    async def _send_one(self, channel_id, payload, report, semaphore):
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            report.failed += 1
+            report.errors[channel_id] = "channel not found"
+            return
+
+        route = self._route(channel_id)
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await route.acquire()
+                await self.global_bucket.acquire()
+                started = time.monotonic()
+                try:
+                    # payload may be a factory so each send gets fresh discord.File objects
+                    kwargs = payload() if callable(payload) else payload
+                    await channel.send(**kwargs)
+                    report.latencies.append(time.monotonic() - started)
+                    report.errors.pop(channel_id, None)
+                    report.sent += 1
+                    return
+                except Exception as err:
+                    report.errors[channel_id] = str(err)
+                    if _is_permanent(err) or attempt == self.max_retries:
+                        break
+                    wait = _retry_after(err)
+                    if wait is not None:
+                        report.rate_limited += 1
+                        # a global 429 stalls everyone, a route 429 only this channel
+                        (self.global_bucket if getattr(err, "is_global", False) else route).block(wait)
+                    else:
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+                    report.retries += 1
+        report.failed += 1
+
+    async def deliver(self, channel_ids, payload) -> DeliveryReport:
+        """Send <payload> (kwargs dict or factory) to every channel in <channel_ids>."""
+        report = DeliveryReport()
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(
+            self._send_one(cid, payload, report, semaphore) for cid in dict.fromkeys(channel_ids)
+        ))
+        report.elapsed = time.monotonic() - started
+        for name in ("sent", "failed", "retries", "rate_limited"):
+            setattr(self.totals, name, getattr(self.totals, name) + getattr(report, name))
+        if report.failed:
+            logging.warning("Delivery failures: %s", report.errors)
+        return report
+
+# =========================================================
+#  Stand‑alone test  →  python ‑m modules.delivery
+# =========================================================
+if __name__ == "__main__":
+    class FakeRateLimited(Exception):
+        retry_after = 0.2
+
+    class FakeChannel:
+        def __init__(self, cid):
+            self.id = cid
+            self.messages = []
+            self.flaky = cid % 10 == 0   # every 10th channel 429s once
+
+        async def send(self, **kwargs):
+            await asyncio.sleep(0.02)   # simulated HTTP round-trip
+            if self.flaky:
+                self.flaky = False
+                raise FakeRateLimited("429 Too Many Requests")
+            self.messages.append(kwargs)
+
+    channels = {cid: FakeChannel(cid) for cid in range(300)}
+    scheduler = SendScheduler(channels.get)
+    result = asyncio.run(scheduler.deliver(list(channels) + [999], {"content": "hi"}))
+    print("📬", result.summary())
+    print("Every channel got exactly one message:",
+          all(len(c.messages) == 1 for c in channels.values()))
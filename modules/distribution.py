@@ -0,0 +1,295 @@
+# =========================================================
+# modules/distribution.py
+# Streaming score distributions (t-digest), global and per item
+#
+#   python -m modules.distribution             # show global quantiles
+#   python -m modules.distribution --rebuild   # recompute from history
+# =========================================================
+import argparse
+import math
+import sqlite3
+from array import array
+
+from modules.database import DB_PATH, iter_history
+
+GLOBAL = "\x00all"          # digest key for the score distribution of every item
+GLOBAL_COMPRESSION = 200    # ~compression/2 centroids (≈2 KB), whatever the sample count
+ITEM_COMPRESSION = 50
+MIN_SAMPLES = 5             # fewer scores than this → no per-item rank yet
+IN_CHUNK = 500              # item names per IN (...) lookup
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning & Ertl): a sorted list of (mean, weight)
+    centroids whose sizes shrink towards the tails, so extreme quantiles
+    stay accurate while memory stays bounded by the compression.
+    """
+
+    def __init__(self, compression=ITEM_COMPRESSION):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    # -----------------------------------------------------
+    # Updates
+    # -----------------------------------------------------
+    def add(self, value, weight=1.0):
+        value = float(value)
+        self._buffer.append((value, float(weight)))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._flush()
+
+    def merge(self, other):
+        """Fold another digest into this one."""
+        other._flush()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+
+        means, weights = [], []
+        total = self.count
+        scale = self.compression / (2 * math.pi)
+        done = 0.0
+        k_start = -scale * math.pi / 2      # k(0)
+        mean, weight = points[0]
+        for value, w in points[1:]:
+            # k1 scale function: a centroid may span at most one unit of
+            # k(q) = δ/2π·asin(2q−1), which keeps tail centroids small
+            q = min(1.0, (done + weight + w) / total)
+            if scale * math.asin(2 * q - 1) - k_start <= 1:
+                weight += w
+                mean += (value - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                done += weight
+                k_start = scale * math.asin(min(1.0, 2 * done / total - 1))
+                mean, weight = value, w
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    # -----------------------------------------------------
+    # Queries
+    # -----------------------------------------------------
+    def _knots(self):
+        """(value, cumulative weight) points of the piecewise-linear CDF."""
+        self._flush()
+        knots = [(self.min, 0.0)]
+        seen = 0.0
+        for mean, weight in zip(self.means, self.weights):
+            knots.append((mean, seen + weight / 2))
+            seen += weight
+        knots.append((self.max, self.count))
+        return knots
+
+    def cdf(self, value):
+        """Fraction of recorded scores at or below <value> (0..1), None if empty."""
+        if not self.count:
+            return None
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+        knots = self._knots()
+        lo = 0
+        hi = len(knots) - 1
+        while hi - lo > 1:              # last knot with x <= value
+            mid = (lo + hi) // 2
+            if knots[mid][0] <= value:
+                lo = mid
+            else:
+                hi = mid
+        (x0, c0), (x1, c1) = knots[lo], knots[lo + 1]
+        if x1 == x0:
+            return c1 / self.count
+        return (c0 + (c1 - c0) * (value - x0) / (x1 - x0)) / self.count
+
+    def quantile(self, q):
+        """Score below which a fraction <q> of recorded scores fall, None if empty."""
+        if not self.count:
+            return None
+        target = min(max(q, 0.0), 1.0) * self.count
+        knots = self._knots()
+        for (x0, c0), (x1, c1) in zip(knots, knots[1:]):
+            if target <= c1:
+                return x0 if c1 == c0 else x0 + (x1 - x0) * (target - c0) / (c1 - c0)
+        return self.max
+
+    # -----------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------
+    def to_bytes(self) -> bytes:
+        self._flush()
+        data = array("d", [self.compression, self.count, self.min, self.max])
+        for mean, weight in zip(self.means, self.weights):
+            data.extend((mean, weight))
+        return data.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob):
+        data = array("d")
+        data.frombytes(blob)
+        digest = cls(int(data[0]))
+        digest.count, digest.min, digest.max = data[1], data[2], data[3]
+        digest.means = list(data[4::2])
+        digest.weights = list(data[5::2])
+        return digest
+
+
+# ---------------------------------------------------------
+#  Storage
+# ---------------------------------------------------------
+def _ensure_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS score_digests (
+            item_name TEXT PRIMARY KEY,
+            digest BLOB NOT NULL
+        )
+    """)
+
+
+def _load(conn, names):
+    """{name: TDigest} for the stored digests among <names>."""
+    names = list(names)
+    found = {}
+    for i in range(0, len(names), IN_CHUNK):
+        chunk = names[i:i + IN_CHUNK]
+        rows = conn.execute(
+            f"SELECT item_name, digest FROM score_digests "
+            f"WHERE item_name IN ({','.join('?' * len(chunk))})",
+            chunk,
+        )
+        for name, blob in rows:
+            found[name] = TDigest.from_bytes(blob)
+    return found
+
+
+def record_scores(conn, scores):
+    """
+    Add (item_name, score) pairs to the global and per-item digests using
+    the caller's connection, so they commit together with the rows saved.
+    """
+    scores = list(scores)
+    if not scores:
+        return
+    _ensure_table(conn)
+    digests = _load(conn, {GLOBAL} | {name for name, _ in scores})
+    digests.setdefault(GLOBAL, TDigest(GLOBAL_COMPRESSION))
+    for name, score in scores:
+        digests[GLOBAL].add(score)
+        digests.setdefault(name, TDigest(ITEM_COMPRESSION)).add(score)
+    conn.executemany(
+        "INSERT OR REPLACE INTO score_digests (item_name, digest) VALUES (?, ?)",
+        [(name, digest.to_bytes()) for name, digest in digests.items()],
+    )
+
+
+def merge_digests(conn, source, target):
+    """Fold <source>'s per-item digest into <target>'s (after an identity merge)."""
+    _ensure_table(conn)
+    digests = _load(conn, (source, target))
+    if source not in digests:
+        return
+    merged = digests.get(target, TDigest(ITEM_COMPRESSION))
+    merged.merge(digests[source])
+    conn.execute("DELETE FROM score_digests WHERE item_name=?", (source,))
+    conn.execute(
+        "INSERT OR REPLACE INTO score_digests (item_name, digest) VALUES (?, ?)",
+        (target, merged.to_bytes()),
+    )
+
+
+def rebuild_digests(block_size=5000):
+    """Recompute every digest from stored history (aggregate rows count once per sample)."""
+    digests = {GLOBAL: TDigest(GLOBAL_COMPRESSION)}
+    for _, name, score, _, _, samples, _ in iter_history(block_size=block_size):
+        digests[GLOBAL].add(score, samples)
+        digests.setdefault(name, TDigest(ITEM_COMPRESSION)).add(score, samples)
+
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        _ensure_table(conn)
+        conn.execute("DELETE FROM score_digests")
+        conn.executemany(
+            "INSERT INTO score_digests (item_name, digest) VALUES (?, ?)",
+            [(name, digest.to_bytes()) for name, digest in digests.items()],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(digests) - 1
+
+
+# ---------------------------------------------------------
+#  Reads for embeds, alerts and the dashboard
+# ---------------------------------------------------------
+def _read(names, db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        _ensure_table(conn)
+        return _load(conn, names)
+    finally:
+        conn.close()
+
+
+def percentile_ranks(pairs, db_path=None):
+    """
+    {item_name: (overall, own)} percentile ranks (0–100) of each
+    (item_name, score) pair: against every score recorded, and against the
+    item's own history (None until it has MIN_SAMPLES scores).
+    """
+    pairs = list(pairs)
+    digests = _read({GLOBAL} | {name for name, _ in pairs}, db_path)
+    overall = digests.get(GLOBAL)
+    ranks = {}
+    for name, score in pairs:
+        own = digests.get(name)
+        ranks[name] = (
+            overall.cdf(score) * 100 if overall else None,
+            own.cdf(score) * 100 if own and own.count >= MIN_SAMPLES else None,
+        )
+    return ranks
+
+
+def score_thresholds(quantiles=(0.5, 0.9), db_path=None):
+    """Global score quantiles, e.g. the median and 90th percentile; None before any data."""
+    overall = _read({GLOBAL}, db_path).get(GLOBAL)
+    if overall is None:
+        return None
+    return tuple(overall.quantile(q) for q in quantiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score distribution statistics")
+    parser.add_argument("--rebuild", action="store_true", help="recompute digests from history")
+    args = parser.parse_args()
+    if args.rebuild:
+        print(f"📊 rebuilt digests for {rebuild_digests():,} items")
+    qs = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+    values = score_thresholds(qs)
+    if values is None:
+        print("⚠️ No scores recorded yet.")
+        return
+    for q, value in zip(qs, values):
+        print(f"   P{q * 100:<4g} {value:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# =========================================================
+# modules/export.py
+# Streams trend history to gzip'd CSV / NDJSON in constant memory
+#
+#   python -m modules.export 2025-01-01 2025-02-01            # CSV
+#   python -m modules.export 2025-01-01 2025-02-01 -f ndjson
+# =========================================================
+import argparse
+import csv
+import gzip
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from modules.database import HISTORY_COLUMNS, iter_history
+
+EXPORT_DIR = Path("data/exports")
+FORMATS = ("csv", "ndjson")
+
+
+def parse_range(start: str, end: str = None):
+    """
+    Turn 'YYYY-MM-DD' (or any ISO timestamp) bounds into ISO strings.
+    A missing <end> means one day after <start>; a bare end date is inclusive.
+    """
+    start_dt = datetime.fromisoformat(start)
+    if end is None:
+        end_dt = start_dt + timedelta(days=1)
+    else:
+        end_dt = datetime.fromisoformat(end)
+        if len(end) == 10:
+            end_dt += timedelta(days=1)
+    if end_dt <= start_dt:
+        raise ValueError("end of the range must be after its start")
+    return start_dt.isoformat(timespec="seconds"), end_dt.isoformat(timespec="seconds")
+
+
+def export_history(start, end, fmt="csv", item_name=None, out_dir=EXPORT_DIR):
+    """
+    Write every snapshot in [start, end) to a gzip-compressed file.
+    Rows are streamed block by block from SQLite straight into the
+    compressor, so memory use does not grow with the range.
+    Returns (path, row_count).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format '{fmt}' (choose from {', '.join(FORMATS)})")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    last_day = (datetime.fromisoformat(end) - timedelta(seconds=1)).date()
+    label = f"{start[:10]}_{last_day}" + (f"_{item_name.replace(' ', '_')}" if item_name else "")
+    path = out_dir / f"trends_{label}.{fmt}.gz"
+
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        rows = iter_history(start, end, item_name)
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(HISTORY_COLUMNS)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(dict(zip(HISTORY_COLUMNS, row)), ensure_ascii=False))
+                f.write("\n")
+                count += 1
+    return path, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export trend history")
+    parser.add_argument("start", help="first day, YYYY-MM-DD")
+    parser.add_argument("end", nargs="?", help="last day (inclusive), default: start")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="csv")
+    parser.add_argument("--item", help="only export this item")
+    parser.add_argument("-o", "--out-dir", default=str(EXPORT_DIR))
+    args = parser.parse_args()
+
+    start, end = parse_range(args.start, args.end)
+    path, count = export_history(start, end, args.format, args.item, args.out_dir)
+    print(f"📦 exported {count:,} rows → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+# =========================================================
+# modules/identity.py
+# Canonical item identity: name normalisation, alias → item
+# mapping at ingest, and MinHash/LSH near-duplicate search
+#
+#   python -m modules.identity migrate           # rewrite stored history
+#   python -m modules.identity duplicates        # review near-duplicates
+#   python -m modules.identity merge "Mini-Blendr" "Mini Blender"
+# =========================================================
+import argparse
+import hashlib
+import re
+import sqlite3
+import struct
+import unicodedata
+import zlib
+from functools import lru_cache
+
+from modules.database import AGGREGATE_TABLES, DB_PATH, bump_generation
+from modules.distribution import merge_digests
+
+NUM_PERM = 32          # MinHash signature length
+BANDS = 8              # LSH bands of NUM_PERM // BANDS rows → candidates from J ≈ 0.6
+SIMILARITY = 0.6       # shingle Jaccard needed to suggest a merge
+MAX_BUCKET = 50        # ignore LSH buckets shared by more items (too generic to be useful)
+
+_ROWS = NUM_PERM // BANDS
+_NON_WORD = re.compile(r"[\W_]+")
+# 3-gram → its NUM_PERM hash values; the gram vocabulary is small, so
+# each gram is hashed once per process however many names contain it
+_gram_hashes = {}
+
+# Same upsert as modules/retention.py: aggregate rows fold together on rename
+_UPSERT = """
+    ON CONFLICT(bucket, item_name) DO UPDATE SET
+        score_sum = score_sum + excluded.score_sum,
+        score_min = MIN(score_min, excluded.score_min),
+        score_max = MAX(score_max, excluded.score_max),
+        likes = MAX(likes, excluded.likes),
+        comments = MAX(comments, excluded.comments),
+        samples = samples + excluded.samples
+"""
+
+
+# ---------------------------------------------------------
+#  Normalisation
+# ---------------------------------------------------------
+def normalize_name(name: str) -> str:
+    """'  Mini-Blender™ ' → 'mini blender' (Unicode-folded, punctuation as spaces)."""
+    name = unicodedata.normalize("NFKC", name).casefold()
+    return _NON_WORD.sub(" ", name).strip()
+
+
+def identity_key(name: str) -> str:
+    """Names sharing this key are the same item ('Mini Blender' = 'mini-blender' = 'MiniBlender')."""
+    return normalize_name(name).replace(" ", "")
+
+
+@lru_cache(maxsize=200_000)
+def shingles(name: str):
+    """Character 3-grams of the normalised name, used for similarity."""
+    text = f" {normalize_name(name)} "
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def jaccard(a, b) -> float:
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if a or b else 0.0
+
+
+def _hash_gram(gram):
+    data = gram.encode("utf-8")
+    # two salted 64-byte digests give 32 independent 32-bit hash functions
+    values = struct.unpack("16I", hashlib.blake2b(data, salt=b"trendbot-a").digest()) \
+        + struct.unpack("16I", hashlib.blake2b(data, salt=b"trendbot-b").digest())
+    if len(_gram_hashes) >= 1_000_000:
+        _gram_hashes.clear()
+    _gram_hashes[gram] = values
+    return values
+
+
+def band_keys(grams):
+    """LSH bucket keys (one per band) of a shingle set's MinHash signature."""
+    get = _gram_hashes.get
+    signature = list(map(min, zip(*[get(g) or _hash_gram(g) for g in grams])))
+    return [
+        (band << 32) | zlib.crc32(struct.pack(f"{_ROWS}I", *signature[band * _ROWS:(band + 1) * _ROWS]))
+        for band in range(BANDS)
+    ]
+
+
+# ---------------------------------------------------------
+#  Storage
+# ---------------------------------------------------------
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS item_aliases (
+            key TEXT PRIMARY KEY,
+            item_id INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS item_bands (
+            band INTEGER NOT NULL,
+            item_id INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_item_bands ON item_bands (band);
+        CREATE TABLE IF NOT EXISTS item_candidates (
+            item_a INTEGER NOT NULL,
+            item_b INTEGER NOT NULL,
+            similarity REAL,
+            PRIMARY KEY (item_a, item_b)
+        );
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+    """)
+    return conn
+
+
+def _generation(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key='identity_generation'").fetchone()
+    return row[0] if row else 0
+
+
+def _bump(conn):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('identity_generation', 1) "
+        "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+    )
+
+
+# In-process alias cache: identity key → canonical name. Reloaded whenever
+# another process (or a merge) bumps identity_generation.
+_cache = {"generation": None, "names": {}}
+
+
+def _aliases(conn):
+    generation = _generation(conn)
+    if generation != _cache["generation"]:
+        _cache["names"] = dict(conn.execute(
+            "SELECT a.key, i.name FROM item_aliases a JOIN items i ON i.id = a.item_id"
+        ))
+        _cache["generation"] = generation
+    return _cache["names"]
+
+
+def _band_index(conn, bands):
+    """
+    Members of the given LSH buckets, loaded in one query:
+    band → [(item_id, name)], or None for buckets over MAX_BUCKET items.
+    Empty buckets are left out.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_bands (band INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM wanted_bands")
+    conn.executemany("INSERT OR IGNORE INTO wanted_bands VALUES (?)", ((band,) for band in bands))
+    sizes = dict(conn.execute(
+        "SELECT band, COUNT(*) FROM item_bands JOIN wanted_bands USING (band) GROUP BY band"
+    ))
+    oversized = [band for band, size in sizes.items() if size > MAX_BUCKET]
+    conn.executemany("DELETE FROM wanted_bands WHERE band=?", ((band,) for band in oversized))
+
+    index = dict.fromkeys(oversized)
+    rows = conn.execute(
+        "SELECT w.band, b.item_id, i.name FROM wanted_bands w "
+        "JOIN item_bands b ON b.band = w.band JOIN items i ON i.id = b.item_id"
+    )
+    for band, item_id, name in rows:
+        index.setdefault(band, []).append((item_id, name))
+    return index
+
+
+def _find_near_duplicates(item_id, name, keys, index):
+    """
+    Items sharing an LSH bucket with <name> whose shingles overlap enough,
+    as item_candidates rows; then adds the item to its buckets in <index>.
+    """
+    others = {}
+    for band in keys:
+        members = index.setdefault(band, [])
+        if members is None:
+            continue
+        others.update(members)
+        members.append((item_id, name))
+        if len(members) > MAX_BUCKET:
+            index[band] = None
+    others.pop(item_id, None)
+
+    grams = shingles(name)
+    found = []
+    for other_id, other_name in others.items():
+        similarity = jaccard(grams, shingles(other_name))
+        if similarity >= SIMILARITY:
+            a, b = sorted((item_id, other_id))
+            found.append((a, b, round(similarity, 3)))
+    return found
+
+
+# ---------------------------------------------------------
+#  Public API
+# ---------------------------------------------------------
+def resolve_names(names):
+    """
+    Map raw item names to canonical names, registering unseen items.
+    Known names cost one dict lookup; only brand-new items are hashed
+    into the LSH index and checked for near-duplicates, against the
+    buckets of the whole batch loaded in one query.
+    Returns {raw name: canonical name}.
+    """
+    names = list(dict.fromkeys(names))
+    conn = _connect()
+    try:
+        known = _aliases(conn)
+        resolved, new = {}, {}
+        for name in names:
+            key = identity_key(name)
+            if not key:
+                resolved[name] = name
+            elif key in known:
+                resolved[name] = known[key]
+            else:
+                new.setdefault(key, name)   # first spelling seen becomes canonical
+
+        if new:
+            conn.execute("BEGIN IMMEDIATE")
+            if _generation(conn) != _cache["generation"]:
+                # another process registered items meanwhile
+                known = _aliases(conn)
+                for key in [k for k in new if k in known]:
+                    del new[key]
+            bands = {name: band_keys(shingles(name)) for name in new.values()}
+            index = _band_index(conn, {band for keys in bands.values() for band in keys})
+            band_rows, candidates = [], []
+            for key, name in new.items():
+                cur = conn.execute("INSERT OR IGNORE INTO items (name) VALUES (?)", (name,))
+                item_id = cur.lastrowid if cur.rowcount else conn.execute(
+                    "SELECT id FROM items WHERE name=?", (name,)
+                ).fetchone()[0]
+                conn.execute("INSERT OR IGNORE INTO item_aliases VALUES (?, ?)", (key, item_id))
+                candidates += _find_near_duplicates(item_id, name, bands[name], index)
+                band_rows += [(band, item_id) for band in bands[name]]
+            conn.executemany("INSERT INTO item_bands VALUES (?, ?)", band_rows)
+            conn.executemany("INSERT OR REPLACE INTO item_candidates VALUES (?, ?, ?)", candidates)
+            _bump(conn)
+            conn.commit()
+            known = _aliases(conn)   # picks up the new aliases (and any merge) in one reload
+            for name in names:
+                if name not in resolved:
+                    resolved[name] = known.get(identity_key(name), name)
+        return resolved
+    finally:
+        conn.close()
+
+
+def canonical_name(name: str):
+    """Canonical spelling of <name>, or None if the item was never seen."""
+    conn = _connect()
+    try:
+        return _aliases(conn).get(identity_key(name))
+    finally:
+        conn.close()
+
+
+def canonicalize_items(items):
+    """
+    Rename TrendItems to their canonical names in place, keeping only the
+    best-scoring entry when several spellings of one item arrive together.
+    """
+    mapping = resolve_names([item.item_name for item in items])
+    best = {}
+    for item in items:
+        item.item_name = mapping.get(item.item_name, item.item_name)
+        if item.item_name not in best or item.intent_score > best[item.item_name].intent_score:
+            best[item.item_name] = item
+    return [item for item in items if best[item.item_name] is item]
+
+
+def _rename_history(conn, old, new):
+    """Move every stored row of <old> onto <new>, folding aggregate buckets together."""
+    moved = conn.execute("UPDATE trends SET item_name=? WHERE item_name=?", (new, old)).rowcount
+    for table in AGGREGATE_TABLES:
+        conn.execute(
+            f"INSERT INTO {table} "
+            f"(bucket, item_name, score_sum, score_min, score_max, likes, comments, samples) "
+            f"SELECT bucket, ?, score_sum, score_min, score_max, likes, comments, samples "
+            f"FROM {table} WHERE item_name=? {_UPSERT}",
+            (new, old),
+        )
+        moved += conn.execute(f"DELETE FROM {table} WHERE item_name=?", (old,)).rowcount
+    return moved
+
+
+def canonicalize_history():
+    """
+    Rewrite stored history recorded under non-canonical spellings
+    (e.g. rows saved before identities existed). Idempotent.
+    Returns the number of rows moved.
+    """
+    conn = _connect()
+    try:
+        # most-recorded spelling first, so it becomes the canonical one
+        stored = [name for (name,) in conn.execute(
+            "SELECT item_name FROM ("
+            "SELECT item_name, COUNT(*) AS n FROM trends GROUP BY item_name "
+            + "".join(f"UNION ALL SELECT item_name, SUM(samples) FROM {t} GROUP BY item_name "
+                      for t in AGGREGATE_TABLES)
+            + ") WHERE item_name IS NOT NULL GROUP BY item_name ORDER BY SUM(n) DESC"
+        )]
+    finally:
+        conn.close()
+
+    mapping = resolve_names(stored)
+    moved = 0
+    conn = _connect()
+    try:
+        for old, new in mapping.items():
+            if old != new:
+                moved += _rename_history(conn, old, new)
+                merge_digests(conn, old, new)
+        conn.commit()
+    finally:
+        conn.close()
+    if moved:
+        bump_generation()
+    return moved
+
+
+def merge_items(source: str, target: str):
+    """
+    Fold item <source> into <target>: its aliases, future ingests and all
+    stored history now belong to <target>. Returns (source, target, rows moved)
+    using canonical names; raises ValueError for unknown or identical items.
+    """
+    conn = _connect()
+    try:
+        known = _aliases(conn)
+        src, dst = known.get(identity_key(source)), known.get(identity_key(target))
+        if src is None or dst is None:
+            raise ValueError(f"Unknown item '{source if src is None else target}'")
+        if src == dst:
+            raise ValueError(f"'{source}' and '{target}' are already the same item")
+
+        (src_id,) = conn.execute("SELECT id FROM items WHERE name=?", (src,)).fetchone()
+        (dst_id,) = conn.execute("SELECT id FROM items WHERE name=?", (dst,)).fetchone()
+        conn.execute("UPDATE item_aliases SET item_id=? WHERE item_id=?", (dst_id, src_id))
+        conn.execute("DELETE FROM item_bands WHERE item_id=?", (src_id,))
+        conn.execute("DELETE FROM item_candidates WHERE item_a=? OR item_b=?", (src_id, src_id))
+        conn.execute("DELETE FROM items WHERE id=?", (src_id,))
+        moved = _rename_history(conn, src, dst)
+        merge_digests(conn, src, dst)
+        _bump(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    bump_generation()
+    return src, dst, moved
+
+
+def duplicate_candidates(limit: int = 20):
+    """Suggested merges as (name, other name, similarity), most similar first."""
+    conn = _connect()
+    try:
+        return conn.execute(
+            "SELECT a.name, b.name, c.similarity FROM item_candidates c "
+            "JOIN items a ON a.id = c.item_a JOIN items b ON b.id = c.item_b "
+            "ORDER BY c.similarity DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item identity maintenance")
+    sub = parser.add_subparsers(dest="action", required=True)
+    sub.add_parser("migrate", help="rewrite stored history to canonical names")
+    dup = sub.add_parser("duplicates", help="list suggested merges")
+    dup.add_argument("-n", type=int, default=20)
+    merge = sub.add_parser("merge", help="merge SOURCE into TARGET")
+    merge.add_argument("source")
+    merge.add_argument("target")
+    args = parser.parse_args()
+
+    if args.action == "migrate":
+        print(f"🪪 moved {canonicalize_history():,} rows onto canonical names")
+    elif args.action == "duplicates":
+        for a, b, similarity in duplicate_candidates(args.n):
+            print(f"   {similarity:.2f}  {a}  ≈  {b}")
+    else:
+        src, dst, moved = merge_items(args.source, args.target)
+        print(f"🔗 merged '{src}' into '{dst}' ({moved:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,11 @@
 # modules/insights.py
 # Provides quick summaries and comparisons from SQLite data
 # =========================================================
-import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from modules.database import iter_rows
+
 DB_PATH = Path("data/trends.db")
 
 def get_summary(hours: int = 24):
@@ -16,22 +17,24 @@ def get_summary(hours: int = 24):
     if not DB_PATH.exists():
         return None
 
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
     cutoff = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="seconds")
 
-    cur.execute(
+    rows = iter_rows(
         "SELECT item_name, AVG(score) FROM trends "
         "WHERE timestamp >= ? GROUP BY item_name ORDER BY AVG(score) DESC",
         (cutoff,),
+        db_path=DB_PATH,
     )
-    rows = cur.fetchall()
-    conn.close()
 
-    if not rows:
+    top_item, score_total, total_items = None, 0.0, 0
+    for name, avg in rows:
+        if top_item is None:
+            top_item = name
+        score_total += avg
+        total_items += 1
+
+    if not total_items:
         return None
 
-    top_item = rows[0][0]
-    avg_score = sum(r[1] for r in rows) / len(rows)
-    total_items = len(rows)
-    return top_item, avg_score, total_items
\ No newline at end of file
+    avg_score = score_total / total_items
+    return top_item, avg_score, total_items
@@ -0,0 +1,163 @@
+# =========================================================
+# modules/leaderboard_queue.py
+# Durable SQLite hand-off of finished leaderboards: worker → bot
+# =========================================================
+import json
+import sqlite3
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+from modules.breakout import Breakout
+from modules.data_structures import TrendItem
+from modules.database import DB_PATH
+
+STALE_HOURS = 24   # unposted leaderboards older than this are dropped (the bot was down)
+CLAIM_SECONDS = 300   # a claim not confirmed by mark_posted() within this is retried
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS leaderboards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            posted_at TEXT,
+            claimed_at REAL
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(leaderboards)")}
+    if "claimed_at" not in columns:   # queue created before claims existed
+        conn.execute("ALTER TABLE leaderboards ADD COLUMN claimed_at REAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS worker_lease (
+            name TEXT PRIMARY KEY,
+            owner TEXT,
+            expires_at REAL
+        )
+    """)
+    return conn
+
+
+def publish(items, movement_icons, breakouts=(), error=None):
+    """Queue one finished leaderboard for the bot; returns its id."""
+    payload = {
+        # captions are only needed for scoring, keep queue rows small
+        "items": [dict(item.as_dict(), caption_texts=[]) for item in items],
+        "movement": movement_icons,
+        "breakouts": [asdict(hit) for hit in breakouts],
+        "error": error,
+    }
+    now = datetime.now()
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "INSERT INTO leaderboards (created_at, payload) VALUES (?, ?)",
+            (now.isoformat(timespec="seconds"), json.dumps(payload, ensure_ascii=False)),
+        )
+        conn.execute(
+            "DELETE FROM leaderboards WHERE posted_at IS NULL AND created_at < ?",
+            ((now - timedelta(hours=STALE_HOURS)).isoformat(timespec="seconds"),),
+        )
+    finally:
+        conn.close()
+    return cur.lastrowid
+
+
+def _decode(payload):
+    payload = json.loads(payload)
+    items = []
+    for data in payload["items"]:
+        data["post_time"] = datetime.fromisoformat(data["post_time"])
+        items.append(TrendItem(**data))
+    breakouts = [Breakout(**hit) for hit in payload["breakouts"]]
+    return items, payload["movement"], breakouts, payload["error"]
+
+
+def claim_next():
+    """
+    Atomically claim the oldest unposted leaderboard.
+    Returns (job_id, items, movement_icons, breakouts, error), or None if the
+    queue is empty. Call mark_posted(job_id) once it is delivered, or
+    release(job_id) if delivery failed; a claim left unconfirmed (the bot
+    crashed) is handed out again after CLAIM_SECONDS.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id, payload FROM leaderboards WHERE posted_at IS NULL "
+            "AND (claimed_at IS NULL OR claimed_at < ?) ORDER BY id LIMIT 1",
+            (now - CLAIM_SECONDS,),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute("UPDATE leaderboards SET claimed_at=? WHERE id=?", (now, row[0]))
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return (row[0], *_decode(row[1]))
+
+
+def mark_posted(job_id):
+    """Record a claimed leaderboard as delivered."""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "UPDATE leaderboards SET posted_at=? WHERE id=?",
+            (datetime.now().isoformat(timespec="seconds"), job_id),
+        )
+        # only the newest posted leaderboard is kept (for !trends via latest())
+        conn.execute(
+            "DELETE FROM leaderboards WHERE posted_at IS NOT NULL AND id < ?", (job_id,)
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def release(job_id):
+    """Give up a claim so the leaderboard is retried on the next poll."""
+    conn = _connect()
+    try:
+        conn.execute("UPDATE leaderboards SET claimed_at=NULL WHERE id=?", (job_id,))
+    finally:
+        conn.close()
+
+
+def latest():
+    """
+    The most recent leaderboard the worker produced, posted or not, without
+    claiming it: (items, movement_icons, breakouts, error), or None before
+    the first cycle.
+    """
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT payload FROM leaderboards ORDER BY id DESC LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    return _decode(row[0]) if row else None
+
+
+def acquire_lease(name, owner, ttl_seconds):
+    """
+    Try to hold the named lease for <ttl_seconds>. Lets several worker
+    processes run side by side while only one performs each cycle.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("INSERT OR IGNORE INTO worker_lease (name, owner, expires_at) VALUES (?, '', 0)",
+                     (name,))
+        cur = conn.execute(
+            "UPDATE worker_lease SET owner=?, expires_at=? "
+            "WHERE name=? AND (expires_at < ? OR owner=?)",
+            (owner, now + ttl_seconds, name, now, owner),
+        )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
@@ -0,0 +1,270 @@
+# =========================================================
+# modules/logs.py
+# Non-blocking structured logging for the bot and the worker
+#
+# Log calls only put the record on a queue; a listener thread does
+# the formatting, disk writes, rotation and gzip compression, so a
+# slow disk can never stall the Discord heartbeat. The file gets one
+# JSON object per line (with run_id / stage / seconds when set), the
+# console gets the familiar one-line text.
+#
+#   with log_run("hourly"):            # every record gets the run id
+#       with stage("ingest"):          # → {"stage": "ingest", "seconds": …}
+#           ...
+# =========================================================
+import atexit
+import contextvars
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# ---------------------------------------------------------
+#  Settings (overridable from data/config.json)
+# ---------------------------------------------------------
+try:
+    with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+        MAX_BYTES = cfg.get("LOG_MAX_BYTES", 5 * 1024 * 1024)
+        ROTATE_HOURS = cfg.get("LOG_ROTATE_HOURS", 24)
+        BACKUP_COUNT = cfg.get("LOG_BACKUP_COUNT", 14)
+except Exception:
+    MAX_BYTES = 5 * 1024 * 1024   # rotate once the live file reaches 5 MB…
+    ROTATE_HOURS = 24             # …or is a day old, whichever comes first
+    BACKUP_COUNT = 14             # compressed files kept per log
+
+QUEUE_SIZE = 10_000               # records buffered before new ones are dropped
+CONSOLE_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+# attributes every LogRecord has; anything else came in through extra={...}
+_STANDARD = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_TRACEBACKS = logging.Formatter()
+
+_run_id = contextvars.ContextVar("run_id", default=None)
+_listener = None
+
+
+# ---------------------------------------------------------
+#  Run ids and stage timings
+# ---------------------------------------------------------
+def current_run():
+    """Run id of the job this code runs under, or None."""
+    return _run_id.get()
+
+
+@contextmanager
+def log_run(kind: str):
+    """
+    Tag every record logged inside the block (including from threads
+    started with asyncio.to_thread) with a fresh run id, and log the
+    run's total duration when it ends.
+    """
+    run_id = f"{kind}-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+    token = _run_id.set(run_id)
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield run_id
+        ok = True
+    finally:
+        seconds = time.perf_counter() - started
+        logging.log(
+            logging.INFO if ok else logging.WARNING,
+            "Run %s %s in %.2fs", kind, "finished" if ok else "failed", seconds,
+            extra={"run": kind, "seconds": round(seconds, 4), "ok": ok},
+            stacklevel=3,   # report the module that opened the block, not this one
+        )
+        _run_id.reset(token)
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """Log how long the block took as a structured stage timing."""
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield fields
+        ok = True
+    finally:
+        seconds = time.perf_counter() - started
+        logging.log(
+            logging.INFO if ok else logging.WARNING,
+            "Stage %s %s in %.3fs", name, "done" if ok else "failed", seconds,
+            extra={"stage": name, "seconds": round(seconds, 4), "ok": ok, **fields},
+            stacklevel=3,
+        )
+
+
+# ---------------------------------------------------------
+#  Formatting
+# ---------------------------------------------------------
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, module, message, run id and extras."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "module": record.module,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "run_id", None):
+            entry["run_id"] = record.run_id
+        for key, value in vars(record).items():
+            if key not in _STANDARD and key != "run_id":
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RunIdFilter(logging.Filter):
+    """Runs in the caller's context, where the run id context variable is visible."""
+
+    def filter(self, record):
+        record.run_id = _run_id.get()
+        return True
+
+
+# ---------------------------------------------------------
+#  Handlers
+# ---------------------------------------------------------
+class CompressingRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """
+    Rotates <path> once it reaches <max_bytes> or every
+    <rotate_hours>, gzip'ing the old file to <path>.YYYYmmdd-HHMMSS-ffffff.gz
+    and keeping the newest <backup_count> of those.
+    Only ever called from the listener thread.
+    """
+
+    def __init__(self, path, max_bytes=MAX_BYTES, rotate_hours=ROTATE_HOURS,
+                 backup_count=BACKUP_COUNT):
+        super().__init__(path, "a", encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+        self.interval = rotate_hours * 3600
+        self.backup_count = backup_count
+        self.rotator = self._compress
+        opened = os.stat(path).st_mtime if os.path.exists(path) else time.time()
+        self.rollover_at = opened + self.interval
+
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            target = f"{self.baseFilename}.{datetime.now():%Y%m%d-%H%M%S-%f}.gz"
+            self.rotate(self.baseFilename, target)
+            self._prune()
+        self.rollover_at = time.time() + self.interval
+        self.stream = self._open()
+
+    @staticmethod
+    def _compress(source, target):
+        with open(source, "rb") as src, gzip.open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def _prune(self):
+        base = Path(self.baseFilename)
+        old = sorted(base.parent.glob(f"{base.name}.*.gz"))     # names sort by time
+        for path in old[:max(0, len(old) - self.backup_count)]:
+            path.unlink(missing_ok=True)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: when the queue is full, records are counted and dropped."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # resolve the message and traceback now (args may change later) but
+        # leave the traceback out of "msg" so the JSON keeps it separate
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _TRACEBACKS.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                note = logging.makeLogRecord({
+                    "name": "logs", "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": "Log queue overflowed; %d records dropped", "args": (self.dropped,),
+                })
+                self.queue.put_nowait(self.prepare(note))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ---------------------------------------------------------
+#  Setup
+# ---------------------------------------------------------
+def setup_logging(path="bot.log", level=logging.INFO, console=True):
+    """
+    Route the root logger through a queue to a rotating JSON file
+    (and a text console handler). Safe to call more than once.
+    Returns the QueueListener; call stop_logging() on shutdown to flush.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    file_handler = CompressingRotatingFileHandler(path)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()   # stderr: stdout stays clean for CLI output
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue = queue.Queue(QUEUE_SIZE)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(_RunIdFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records to disk and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -3,6 +3,7 @@
 # Maintains movement icons compared with last saved report
 # =========================================================
 import csv
+import logging
 from pathlib import Path
 
 def load_last_scores():
@@ -31,7 +32,7 @@ def load_last_scores():
                     score = 0.0
                 scores[name] = score
     except Exception as e:
-        print(f"⚠️ Failed to read previous report: {e}")
+        logging.warning("⚠️ Failed to read previous report: %s", e)
 
     return scores
 
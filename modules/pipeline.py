@@ -0,0 +1,97 @@
+# =========================================================
+# modules/pipeline.py
+# Ingest → score: the CPU-heavy half of a leaderboard run
+# =========================================================
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from modules.data_structures import TrendItem
+from modules.identity import canonicalize_items
+from modules.scoring import update_intent_score
+from modules.sentiment import get_sentiment_scores
+from modules.sketches import record_captions
+from modules.sources.tiktok_loader import get_latest_trends
+from modules.sources.update_cache import update_local_cache
+
+CHUNK_SIZE = 500   # entries per scoring task when a process pool is used
+
+
+def ingest():
+    """Refresh the local cache and return raw trend entries."""
+    try:
+        update_local_cache()
+    except Exception as err:
+        logging.warning("Cache update failed: %s", err)
+
+    raw_items = get_latest_trends()
+
+    try:
+        record_captions(raw_items)
+    except Exception as err:
+        logging.warning("Caption sketch update failed: %s", err)
+    return raw_items
+
+
+def score_entries(entries):
+    """Turn raw entries into scored TrendItems, skipping malformed ones."""
+    items = []
+    for entry in entries:
+        try:
+            items.append(TrendItem(
+                item_name=entry.get("item_name", "Unknown Item"),
+                hashtags=entry.get("hashtags", []),
+                caption_texts=entry.get("caption_texts", []),
+                view_count=entry.get("view_count", 0),
+                like_count=entry.get("like_count", 0),
+                comment_count=entry.get("comment_count", 0),
+                share_count=entry.get("share_count", 0),
+                creator_followers=entry.get("creator_followers", 0),
+                post_time=datetime.now(),
+            ))
+        except Exception as err:
+            logging.warning("Skipping bad entry: %s", err)
+
+    # the sentiment engine is much faster on one big batch than per item
+    try:
+        sentiments = get_sentiment_scores(item.caption_texts for item in items)
+    except Exception as err:
+        logging.warning("Batch sentiment failed, scoring items one by one: %s", err)
+        sentiments = [None] * len(items)
+
+    scored = []
+    for item, sentiment_raw in zip(items, sentiments):
+        try:
+            update_intent_score(item, sentiment_raw)
+            scored.append(item)
+        except Exception as err:
+            logging.warning("Skipping bad entry: %s", err)
+    return scored
+
+
+def load_scored_items(processes: int = 1):
+    """
+    Ingest and score the latest trends.
+    Returns (items sorted by score, error message or None).
+    With processes > 1 scoring is spread over a process pool.
+    """
+    try:
+        raw_items = ingest()
+    except Exception as e:
+        logging.exception("Failed to load trend data: %s", e)
+        return [], str(e)
+
+    if processes > 1 and len(raw_items) > CHUNK_SIZE:
+        chunks = [raw_items[i:i + CHUNK_SIZE] for i in range(0, len(raw_items), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            items = [item for part in pool.map(score_entries, chunks) for item in part]
+    else:
+        items = score_entries(raw_items)
+
+    try:
+        items = canonicalize_items(items)
+    except Exception as err:
+        logging.warning("Item identity resolution failed: %s", err)
+
+    items.sort(key=lambda x: x.intent_score, reverse=True)
+    return items, None
@@ -0,0 +1,70 @@
+# =========================================================
+# modules/query_cache.py
+# Command result cache invalidated by the snapshot generation
+# =========================================================
+import asyncio
+from collections import OrderedDict
+
+from modules.database import get_generation
+
+MAX_ENTRIES = 256
+
+
+class QueryCache:
+    """
+    Caches results of read-only queries keyed by (command, args).
+    An entry is valid while the persistence layer's snapshot generation is
+    unchanged; identical concurrent misses share one computation.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, generation=get_generation):
+        self.max_entries = max_entries
+        self.generation = generation
+        self.entries = OrderedDict()   # key → (generation, value)
+        self.inflight = {}             # (key, generation) → Future
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key, compute, *args):
+        """Return the cached result for <key>, or run compute(*args) in a thread."""
+        generation = await asyncio.to_thread(self.generation)
+
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] == generation:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        flight = (key, generation)
+        pending = self.inflight.get(flight)
+        if pending is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise   # this caller was cancelled
+                # the task computing it was cancelled: compute it ourselves
+                return await self.get(key, compute, *args)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[flight] = future
+        try:
+            value = await asyncio.to_thread(compute, *args)
+        except Exception as err:
+            future.set_exception(err)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(value)
+            self.entries[key] = (generation, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return value
+        finally:
+            del self.inflight[flight]
+            if not future.done():
+                # the computing task was cancelled: don't leave the waiters hanging
+                future.cancel()
@@ -3,9 +3,12 @@
 # Saves each leaderboard to data/reports/
 # =========================================================
 import csv
+import logging
 from datetime import datetime
 from pathlib import Path
 
+from modules.database import bump_generation
+
 def save_report(items):
     """Write a timestamped CSV of current trend list."""
     report_dir = Path("data/reports")
@@ -19,5 +22,6 @@ def save_report(items):
             writer.writerow([idx, item.item_name, item.intent_score,
                              item.like_count, item.comment_count])
 
-    print(f"💾 saved report → {filename}")
+    bump_generation()
+    logging.info("💾 saved report → %s", filename)
     return filename
\ No newline at end of file
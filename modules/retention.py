@@ -0,0 +1,183 @@
+# =========================================================
+# modules/retention.py
+# Tiered retention: raw rows → hourly → daily aggregates
+# =========================================================
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from modules.database import DB_PATH, init_db
+
+# ---------------------------------------------------------
+#  Retention windows (overridable from data/config.json)
+# ---------------------------------------------------------
+try:
+    with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+        RAW_DAYS = cfg.get("RETENTION_RAW_DAYS", 7)
+        HOURLY_DAYS = cfg.get("RETENTION_HOURLY_DAYS", 90)
+        DAILY_DAYS = cfg.get("RETENTION_DAILY_DAYS", None)
+except Exception:
+    RAW_DAYS = 7          # keep every snapshot row for a week
+    HOURLY_DAYS = 90      # then one row per item per hour for ~3 months
+    DAILY_DAYS = None     # daily aggregates are kept forever
+
+BATCH_ROWS = 5000         # rows moved per transaction
+VACUUM_PAGES = 200        # free pages returned to the OS per transaction
+PAUSE_SECONDS = 0.05      # gap between transactions so other writers get in
+
+# Aggregate averages are score_sum / samples, so batches fold in incrementally.
+_UPSERT = """
+    ON CONFLICT(bucket, item_name) DO UPDATE SET
+        score_sum = score_sum + excluded.score_sum,
+        score_min = MIN(score_min, excluded.score_min),
+        score_max = MAX(score_max, excluded.score_max),
+        likes = MAX(likes, excluded.likes),
+        comments = MAX(comments, excluded.comments),
+        samples = samples + excluded.samples
+"""
+
+
+def _incremental_vacuum_enabled(conn):
+    (mode,) = conn.execute("PRAGMA auto_vacuum").fetchone()
+    return mode == 2
+
+
+def enable_incremental_vacuum():
+    """
+    One-off migration for databases created before init_db set
+    auto_vacuum: rewrites the whole file with a full VACUUM, which blocks
+    every writer while it runs — do it while the bot is stopped.
+    Returns False if the DB already used incremental vacuum.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    try:
+        if _incremental_vacuum_enabled(conn):
+            return False
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+
+def _roll_up(conn, source, target, bucket_expr, cutoff, columns):
+    """Move one batch of rows older than <cutoff> from source into target."""
+    key = "timestamp" if source == "trends" else "bucket"
+    pick = (
+        f"SELECT rowid FROM {source} WHERE {key} < ? ORDER BY {key}, rowid LIMIT {BATCH_ROWS}"
+    )
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            f"INSERT INTO {target} "
+            f"(bucket, item_name, score_sum, score_min, score_max, likes, comments, samples) "
+            f"SELECT {bucket_expr}, item_name, {columns} FROM {source} "
+            f"WHERE rowid IN ({pick}) GROUP BY 1, 2 {_UPSERT}",
+            (cutoff,),
+        )
+        moved = conn.execute(f"DELETE FROM {source} WHERE rowid IN ({pick})", (cutoff,)).rowcount
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return moved
+
+
+def _drop_expired(conn, cutoff):
+    """Delete one batch of daily buckets older than <cutoff>."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        dropped = conn.execute(
+            f"DELETE FROM trends_daily WHERE rowid IN "
+            f"(SELECT rowid FROM trends_daily WHERE bucket < ? LIMIT {BATCH_ROWS})",
+            (cutoff,),
+        ).rowcount
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return dropped
+
+
+def run_retention(max_seconds: float = 60.0, now: datetime = None):
+    """
+    Apply the retention tiers in small transactions until there is nothing
+    left to do or <max_seconds> have passed. Returns per-tier row counts.
+    Safe to call repeatedly; unfinished work continues on the next run.
+    """
+    init_db()
+    now = now or datetime.now()
+    raw_cutoff = (now - timedelta(days=RAW_DAYS)).isoformat(timespec="seconds")
+    hourly_cutoff = (now - timedelta(days=HOURLY_DAYS)).isoformat(timespec="seconds")
+
+    stats = {"hourly": 0, "daily": 0, "expired": 0, "vacuumed_pages": 0}
+    deadline = time.monotonic() + max_seconds
+
+    # isolation_level=None → we manage BEGIN/COMMIT ourselves
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    try:
+        # Never VACUUM here: that would block writers for the whole rewrite.
+        reclaim = _incremental_vacuum_enabled(conn)
+        if not reclaim:
+            logging.warning(
+                "trends.db is not in incremental auto-vacuum mode; free pages are reused "
+                "but not returned to the OS (run: python -m modules.retention "
+                "--enable-incremental-vacuum)"
+            )
+
+        steps = [
+            ("hourly", lambda: _roll_up(
+                conn, "trends", "trends_hourly",
+                "substr(timestamp, 1, 13) || ':00:00'", raw_cutoff,
+                "SUM(score), MIN(score), MAX(score), MAX(likes), MAX(comments), COUNT(*)",
+            )),
+            ("daily", lambda: _roll_up(
+                conn, "trends_hourly", "trends_daily",
+                "substr(bucket, 1, 10) || 'T00:00:00'", hourly_cutoff,
+                "SUM(score_sum), MIN(score_min), MAX(score_max), "
+                "MAX(likes), MAX(comments), SUM(samples)",
+            )),
+        ]
+        if DAILY_DAYS:
+            daily_cutoff = (now - timedelta(days=DAILY_DAYS)).isoformat(timespec="seconds")
+            steps.append(("expired", lambda: _drop_expired(conn, daily_cutoff)))
+
+        for name, step in steps:
+            while time.monotonic() < deadline:
+                moved = step()
+                stats[name] += moved
+                if moved < BATCH_ROWS:
+                    break
+                time.sleep(PAUSE_SECONDS)
+
+        while reclaim and time.monotonic() < deadline:
+            (free,) = conn.execute("PRAGMA freelist_count").fetchone()
+            if not free:
+                break
+            # executescript steps the pragma to completion; execute() frees one page
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES});")
+            (left,) = conn.execute("PRAGMA freelist_count").fetchone()
+            stats["vacuumed_pages"] += free - left
+            time.sleep(PAUSE_SECONDS)
+    finally:
+        conn.close()
+    return stats
+
+# =========================================================
+#  Stand‑alone run  →  python ‑m modules.retention
+# =========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retention / downsampling pass")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="one-off VACUUM converting an old trends.db (stop the bot first)")
+    args = parser.parse_args()
+    if args.enable_incremental_vacuum:
+        converted = enable_incremental_vacuum()
+        print("🗜️  trends.db converted to incremental vacuum" if converted
+              else "✅ trends.db already uses incremental vacuum")
+    print("🧹 Retention pass:", run_retention())
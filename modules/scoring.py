@@ -25,13 +25,15 @@ except Exception:
 # =========================================================
 #  Core function
 # =========================================================
-def update_intent_score(item: TrendItem) -> TrendItem:
+def update_intent_score(item: TrendItem, sentiment_raw: float = None) -> TrendItem:
     """
     Calculate and update Intent Score for a TrendItem.
     Components:
       1. Keyword intent signal
       2. Engagement weighting
       3. Sentiment adjustment
+    <sentiment_raw> is the captions' average sentiment when the caller
+    already scored them in a batch; otherwise it is computed here.
     """
 
     # --- 1️⃣ Keyword intent ---
@@ -44,7 +46,8 @@ def update_intent_score(item: TrendItem) -> TrendItem:
     ) * 100  # convert to percent for even scaling
 
     # --- 3️⃣ Sentiment raw value (−1 to +1) ---
-    sentiment_raw = get_sentiment_score(item.caption_texts)
+    if sentiment_raw is None:
+        sentiment_raw = get_sentiment_score(item.caption_texts)
     sentiment_norm = (sentiment_raw + 1) * 50  # shift to 0–100 scale
 
     # --- 4️⃣ Weighted combo ---
@@ -57,6 +60,7 @@ def update_intent_score(item: TrendItem) -> TrendItem:
     item.intent_score = round(total, 2)
     return item
 
+
 # =========================================================
 #  Stand‑alone test  →  python ‑m modules.scoring
 # =========================================================
@@ -0,0 +1,64 @@
+# =========================================================
+# modules/sentiment/__init__.py
+# Provides sentiment scoring for caption text
+# =========================================================
+
+import threading
+
+# one engine we can reuse, built on first use (loading the lexicon is slow)
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from modules.sentiment.batch import BatchSentiment
+                _engine = BatchSentiment()
+    return _engine
+
+
+def prewarm():
+    """Build the engine ahead of the first scoring run (call from a worker thread)."""
+    _get_engine()
+
+
+def compound_scores(texts):
+    """Return the VADER compound score (-1.0 to 1.0) of every text in one batch."""
+    return _get_engine().compound_scores(texts)
+
+
+def get_sentiment_score(texts):
+    """Return the average compound sentiment (-1.0 to 1.0) for a list of texts."""
+    if not texts:
+        return 0.0
+
+    # non‑string values score 0.0 but still count towards the average
+    total = sum(compound_scores(texts))
+
+    # Average across all texts
+    avg = total / max(1, len(texts))
+    return round(avg, 3)
+
+
+def get_sentiment_scores(text_lists):
+    """
+    get_sentiment_score() of every list of texts, with all the texts of a
+    run scored in one batch (the engine is far faster on one big batch
+    than on many small ones).
+    """
+    text_lists = [list(texts or []) for texts in text_lists]
+    scores = compound_scores([text for texts in text_lists for text in texts])
+
+    averages = []
+    start = 0
+    for texts in text_lists:
+        if not texts:
+            averages.append(0.0)
+            continue
+        total = sum(scores[start:start + len(texts)])
+        start += len(texts)
+        averages.append(round(total / len(texts), 3))
+    return averages
@@ -0,0 +1,511 @@
+# =========================================================
+# modules/sentiment/batch.py
+# Batch VADER compound scoring with precompiled lookup tables
+# =========================================================
+import math
+import re
+import string
+import threading
+from bisect import bisect_right
+from pathlib import Path
+
+TEXT_CACHE_SIZE = 50_000    # identical captions are scored once
+TOKEN_CACHE_SIZE = 200_000  # per-token features (lowercase, valence, ...)
+
+_MARKER = "\x00"
+_SEPARATOR = " \x00 "     # joins a batch into one string; "\x00" becomes its own token
+
+# one code character per word for the batched pass, chr(_CODE_BASE + bits):
+# lexicon hit, ALL CAPS, can modify the next three words, can modify the next
+# word, "but", first / later word of a multi-word idiom or booster
+_HIT, _CAPS, _RULE, _NEXT, _BUT, _IDIOM_HEAD, _IDIOM_TAIL = 1, 2, 4, 8, 16, 32, 64
+_CODE_BASE = 0x100
+_END = "|"                # code of the separator token: end of a text
+
+# indices into the per-token feature tuple
+_LOWER, _UPPER, _VALENCE, _BOOST, _NEG, _SPECIAL, _IS_HIT = range(7)
+
+# words (besides boosters, negations and idiom words) that any VADER rule reacts to
+_RULE_WORDS = {"no", "or", "nor", "least", "at", "very", "kind", "of",
+               "so", "this", "never", "without", "doubt", "but"}
+# the ones among them a later word's valence depends on ("or"/"nor" only
+# matter after "no", "at"/"very" before "least", "doubt" after "without",
+# "of" after "kind"; "kind" itself is a lexicon word). "so" and "this" only
+# change the word right after them; further back they need a "never".
+_WINDOW_WORDS = {"no", "least", "never", "without", "kind"}
+_NEXT_WORDS = {"so", "this"}
+
+
+def _code_chars(test):
+    """Every code character whose bits pass <test>."""
+    return "".join(chr(_CODE_BASE + bits) for bits in range(128) if test(bits))
+
+
+def _code_class(test):
+    return "[" + re.escape(_code_chars(test)) + "]"
+
+
+# a text needs the full rule loop if a modifier sits close enough before a
+# hit, a modifier is itself a hit, or it has "but"
+_SLOW_CODES = re.compile("|".join([
+    _code_class(lambda b: b & _RULE) + "[^|]{0,2}" + _code_class(lambda b: b & _HIT),
+    _code_class(lambda b: b & _NEXT) + _code_class(lambda b: b & _HIT),
+    _code_class(lambda b: b & (_RULE | _NEXT) and b & _HIT),
+    _code_class(lambda b: b & _BUT),
+]))
+# every idiom starts with a head word directly followed by a tail word
+_IDIOM_PAIR = re.compile(_code_class(lambda b: b & _IDIOM_HEAD) + _code_class(lambda b: b & _IDIOM_TAIL))
+_CAPS_HIT = re.compile(_code_class(lambda b: b & _CAPS and b & _HIT))
+_HITS = frozenset(_code_chars(lambda b: b & _HIT))
+_CAPS_HITS = frozenset(_code_chars(lambda b: b & _CAPS and b & _HIT))
+_CAPS_CODES = _code_chars(lambda b: b & _CAPS)
+
+
+def _squash(key):
+    """
+    Add punctuation emphasis to summed valences and squash to -1..1 like
+    VADER. <key> is (summed valence, "!" count, "?" count).
+    """
+    sum_s, bangs, qm_count = key
+    ep = min(bangs, 4) * 0.292
+    qm = 0
+    if qm_count > 1:
+        qm = qm_count * 0.18 if qm_count <= 3 else 0.96
+    amplifier = ep + qm
+    if sum_s > 0:
+        sum_s += amplifier
+    elif sum_s < 0:
+        sum_s -= amplifier
+
+    compound = sum_s / math.sqrt((sum_s * sum_s) + 15)
+    compound = max(-1.0, min(1.0, compound))
+    return round(compound, 4)
+
+
+class BatchSentiment:
+    """
+    Re-implementation of vaderSentiment's compound score.
+    The lexicon, booster, negation and idiom tables come from the installed
+    vaderSentiment package; they are compiled once into dict/set lookups and
+    each distinct token's features are computed only once.
+    Scores match SentimentIntensityAnalyzer.polarity_scores()["compound"];
+    see `python -m modules.sentiment.parity`.
+    """
+
+    def __init__(self):
+        import vaderSentiment.vaderSentiment as vader
+
+        base = Path(vader.__file__).parent
+        self.lexicon = {}
+        raw = (base / "vader_lexicon.txt").read_text(encoding="utf-8")
+        for line in raw.rstrip("\n").split("\n"):
+            if not line:
+                continue
+            word, measure = line.strip().split("\t")[0:2]
+            self.lexicon[word] = float(measure)
+
+        emojis = {}
+        raw = (base / "emoji_utf8_lexicon.txt").read_text(encoding="utf-8")
+        for line in raw.rstrip("\n").split("\n"):
+            emoji, description = line.strip().split("\t")[0:2]
+            emojis[emoji] = description
+        # VADER only ever looks emojis up one character at a time
+        self.emojis = {k: v for k, v in emojis.items() if len(k) == 1}
+        self.emoji_chars = frozenset(self.emojis)
+        # emoji → " " + description in one C-level str.translate(); VADER only
+        # adds the space when the previous character isn't one, which split()
+        # can't tell apart
+        self.emoji_table = {ord(k): " " + v for k, v in self.emojis.items()}
+
+        self.c_incr = vader.C_INCR
+        self.n_scalar = vader.N_SCALAR
+        self.negate = frozenset(vader.NEGATE)
+        self.booster = dict(vader.BOOSTER_DICT)
+        self.special = dict(vader.SPECIAL_CASES)
+        # words that can take part in a multi-word idiom / booster n-gram
+        self.idiom_words = frozenset(
+            w for key in list(self.special) + list(self.booster) if " " in key for w in key.split()
+        )
+        self.punctuation = string.punctuation
+
+        # batched pass: texts whose emoji descriptions hold "!"/"?" (which
+        # would change the punctuation counts) or that contain the separator
+        # go one by one
+        self.batch_unsafe = tuple(k for k, v in self.emojis.items() if "!" in v or "?" in v)
+        idioms = [key.split() for key in list(self.special) + list(self.booster) if " " in key]
+        self.idiom_keys = tuple(f" {' '.join(words)} " for words in idioms)
+        self.idiom_heads = frozenset(words[0] for words in idioms)
+        self.idiom_tails = frozenset(w for words in idioms for w in words[1:])
+
+        # one batch at a time: the caches below are shared by every thread
+        self._lock = threading.Lock()
+        self._tokens = _Memo(self._features)
+        self._squashed = _Memo(_squash)
+        self._texts = {}
+        # raw token (emoji and all) → its words' code characters / hit
+        # valences / feature tuples, filled in together by _learn()
+        self._codes = _TokenTable(self._learn)
+        self._values = _TokenTable(self._learn)
+        self._features_of = _TokenTable(self._learn)
+        self._learn(_MARKER)
+
+    # -----------------------------------------------------
+    # Precompiled per-token features
+    # -----------------------------------------------------
+    def _features(self, token):
+        """Feature tuple of one token; cached in self._tokens."""
+        word = token.strip(self.punctuation)
+        if len(word) <= 2:
+            word = token
+        lower = word.lower()
+        boost = self.booster.get(lower)
+        negates = lower in self.negate or "n't" in lower
+        return (
+            lower,
+            word.isupper(),
+            self.lexicon.get(lower),
+            boost,
+            negates,
+            boost is not None or negates or lower in _RULE_WORDS,
+            # only lexicon words that aren't boosters can carry valence
+            boost is None and lower in self.lexicon,
+        )
+
+    def _learn(self, token):
+        """Fill in the batched pass's lookup tables for one raw token."""
+        if token == _MARKER:
+            self._codes[token], self._values[token], self._features_of[token] = _END, (0.0,), ()
+            return
+        if len(self._codes) >= TOKEN_CACHE_SIZE:
+            for table in (self._codes, self._values, self._features_of):
+                table.clear()
+            self._learn(_MARKER)
+        if token.isascii():
+            words = (token,)
+        else:
+            # same words VADER gets: an emoji becomes " " + its description
+            words = token.translate(self.emoji_table).split()
+        features = tuple(self._tokens[word] for word in words)
+        self._codes[token] = "".join(self._code(info) for info in features)
+        self._values[token] = tuple(info[_VALENCE] if info[_IS_HIT] else 0.0 for info in features)
+        self._features_of[token] = features
+
+    def _code(self, info):
+        """The batched pass's code character for one word's features."""
+        lower = info[_LOWER]
+        bits = 0
+        if info[_VALENCE] is not None and info[_BOOST] is None:
+            bits |= _HIT
+        if info[_UPPER]:
+            bits |= _CAPS
+        if info[_BOOST] is not None or info[_NEG] or lower in _WINDOW_WORDS:
+            bits |= _RULE
+        if lower in _NEXT_WORDS:
+            bits |= _NEXT
+        if lower == "but":
+            bits |= _BUT
+        if lower in self.idiom_heads:
+            bits |= _IDIOM_HEAD
+        if lower in self.idiom_tails:
+            bits |= _IDIOM_TAIL
+        return chr(_CODE_BASE + bits)
+
+    def _replace_emoji(self, text):
+        return text if text.isascii() else text.translate(self.emoji_table)
+
+    # -----------------------------------------------------
+    # One text
+    # -----------------------------------------------------
+    def _words(self, text):
+        """Feature tuples of the words of a text whose emoji are replaced."""
+        # (VADER strips the text here; that changes neither split() nor the
+        # '!' / '?' counts, so we skip it)
+        return [self._tokens[word] for word in text.split()]
+
+    def _has_idiom(self, lw):
+        """True if the lowercase words contain a multi-word idiom or booster."""
+        if self.idiom_heads.isdisjoint(lw):
+            return False
+        words = f" {' '.join(lw)} "
+        return any(key in words for key in self.idiom_keys)
+
+    def _compound(self, text):
+        text = self._replace_emoji(text)
+        sum_s = self._valence_sum(self._words(text))
+        return self._squashed[sum_s, text.count("!"), text.count("?")]
+
+    def _valence_sum(self, tokens, idioms=None):
+        """
+        VADER's rule loop over one text's word features; returns the summed
+        valence. idioms=False promises the text holds no multi-word idiom.
+        """
+        hits = [i for i, tok in enumerate(tokens) if tok[_IS_HIT]]
+        if not hits:
+            return 0.0
+
+        n = len(tokens)
+        cap_diff = 0 < sum(tok[_UPPER] for tok in tokens) < n
+
+        n_scalar = self.n_scalar
+        c_incr = self.c_incr
+        lw = [tok[_LOWER] for tok in tokens]
+        special = [tok[_SPECIAL] for tok in tokens]
+        if idioms is None:
+            idioms = self._has_idiom(lw)
+
+        sentiments = [0] * n
+        for i in hits:
+            tok = tokens[i]
+            if not idioms and not any(special[i - 3 if i > 3 else 0:i + 3]):
+                # no rule word within reach: lexicon valence (+ caps emphasis)
+                valence = tok[_VALENCE]
+                if tok[_UPPER] and cap_diff:
+                    valence = valence + c_incr if valence > 0 else valence - c_incr
+                sentiments[i] = valence
+                continue
+            lower = tok[_LOWER]
+            if lower == "kind" and i < n - 1 and lw[i + 1] == "of":
+                continue
+
+            base = valence = tok[_VALENCE]
+            if lower == "no" and i != n - 1 and tokens[i + 1][_VALENCE] is not None:
+                valence = 0.0
+            if (i > 0 and lw[i - 1] == "no") or (i > 1 and lw[i - 2] == "no") \
+                    or (i > 2 and lw[i - 3] == "no" and lw[i - 1] in ("or", "nor")):
+                valence = base * n_scalar
+
+            if tok[_UPPER] and cap_diff:
+                valence = valence + c_incr if valence > 0 else valence - c_incr
+
+            for start_i in range(3):
+                j = i - start_i - 1
+                if j < 0:
+                    break
+                prev = tokens[j]
+                if prev[_VALENCE] is not None:
+                    continue
+                if not prev[_SPECIAL]:
+                    # neither booster nor negation: only "so"/"this" right
+                    # before the hit or an idiom can still change it
+                    if start_i == 2:
+                        if lw[i - 1] == "so" or lw[i - 1] == "this":
+                            valence = valence * 1.25
+                        if idioms:
+                            valence = self._special_idioms_check(valence, lw, i)
+                    continue
+                s = 0.0
+                if prev[_BOOST] is not None:
+                    s = prev[_BOOST]
+                    if valence < 0:
+                        s *= -1
+                    if prev[_UPPER] and cap_diff:
+                        s = s + c_incr if valence > 0 else s - c_incr
+                    if start_i == 1:
+                        s = s * 0.95
+                    elif start_i == 2:
+                        s = s * 0.9
+                valence = valence + s
+                valence = self._negation_check(valence, lw, tokens, start_i, i)
+                if start_i == 2 and idioms:
+                    valence = self._special_idioms_check(valence, lw, i)
+
+            if i > 1 and tokens[i - 1][_VALENCE] is None and lw[i - 1] == "least":
+                if lw[i - 2] != "at" and lw[i - 2] != "very":
+                    valence = valence * n_scalar
+            elif i > 0 and tokens[i - 1][_VALENCE] is None and lw[i - 1] == "least":
+                valence = valence * n_scalar
+            sentiments[i] = valence
+
+        if "but" in lw:
+            sentiments = self._but_check(lw, sentiments)
+        return float(sum(sentiments))
+
+    def _negation_check(self, valence, lw, tokens, start_i, i):
+        if start_i == 0:
+            if tokens[i - 1][_NEG]:
+                valence = valence * self.n_scalar
+        elif start_i == 1:
+            if lw[i - 2] == "never" and (lw[i - 1] == "so" or lw[i - 1] == "this"):
+                valence = valence * 1.25
+            elif lw[i - 2] == "without" and lw[i - 1] == "doubt":
+                pass
+            elif tokens[i - 2][_NEG]:
+                valence = valence * self.n_scalar
+        else:
+            if lw[i - 3] == "never" and (lw[i - 2] == "so" or lw[i - 2] == "this") or \
+                    (lw[i - 1] == "so" or lw[i - 1] == "this"):
+                valence = valence * 1.25
+            elif lw[i - 3] == "without" and (lw[i - 2] == "doubt" or lw[i - 1] == "doubt"):
+                pass
+            elif tokens[i - 3][_NEG]:
+                valence = valence * self.n_scalar
+        return valence
+
+    def _special_idioms_check(self, valence, lw, i):
+        # every idiom/n-gram key is made of idiom words, so skip the string
+        # building unless one of them is nearby
+        words = self.idiom_words
+        if not any(w in words for w in lw[i - 3:i + 3]):
+            return valence
+
+        special = self.special
+        onezero = f"{lw[i - 1]} {lw[i]}"
+        twoonezero = f"{lw[i - 2]} {lw[i - 1]} {lw[i]}"
+        twoone = f"{lw[i - 2]} {lw[i - 1]}"
+        threetwoone = f"{lw[i - 3]} {lw[i - 2]} {lw[i - 1]}"
+        threetwo = f"{lw[i - 3]} {lw[i - 2]}"
+
+        for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if seq in special:
+                valence = special[seq]
+                break
+        if len(lw) - 1 > i:
+            zeroone = f"{lw[i]} {lw[i + 1]}"
+            if zeroone in special:
+                valence = special[zeroone]
+        if len(lw) - 1 > i + 1:
+            zeroonetwo = f"{lw[i]} {lw[i + 1]} {lw[i + 2]}"
+            if zeroonetwo in special:
+                valence = special[zeroonetwo]
+
+        for n_gram in (threetwoone, threetwo, twoone):
+            if n_gram in self.booster:
+                valence = valence + self.booster[n_gram]
+        return valence
+
+    @staticmethod
+    def _but_check(lw, sentiments):
+        # Mirrors VADER exactly, including its use of list.index(), which
+        # resolves repeated values to their first position.
+        bi = lw.index("but")
+        for sentiment in sentiments:
+            si = sentiments.index(sentiment)
+            if si < bi:
+                sentiments.pop(si)
+                sentiments.insert(si, sentiment * 0.5)
+            elif si > bi:
+                sentiments.pop(si)
+                sentiments.insert(si, sentiment * 1.5)
+        return sentiments
+
+    # -----------------------------------------------------
+    # Many texts in one pass
+    # -----------------------------------------------------
+    def _score_batch(self, texts):
+        """
+        Score distinct texts together: one split() over the joined batch,
+        then one code character and one valence per word. Regex scans over
+        the code string find the texts where some VADER rule can fire; those
+        go through the rule loop, every other score is its summed valences
+        (plus the ALL-CAPS bonus where it applies).
+        Returns {text: score}.
+        """
+        scores = {}
+        batch = texts
+        joined = _SEPARATOR.join(batch) + _SEPARATOR
+        # rare: a text holds the separator, or an emoji with "!"/"?" in its
+        # description (which changes the punctuation counts); those take the
+        # one-text path. Checked on the joined string first: ~10x cheaper.
+        if joined.count(_MARKER) != len(batch) or any(emoji in joined for emoji in self.batch_unsafe):
+            batch = []
+            for text in texts:
+                if _MARKER in text or any(emoji in text for emoji in self.batch_unsafe):
+                    scores[text] = self._compound(text)
+                else:
+                    batch.append(text)
+            joined = _SEPARATOR.join(batch) + _SEPARATOR
+
+        tokens = joined.split()
+        codes = "".join([self._codes[token] for token in tokens])
+        values = [value for token in tokens for value in self._values[token]]
+
+        # codes/values of text k: [starts[k], ends[k]), then its "|" marker
+        parts = codes.split(_END)[:-1]
+        starts, ends, sums = [], [], []
+        start = 0
+        for part in parts:
+            starts.append(start)
+            ends.append(start + len(part))
+            sums.append(sum(values[start:start + len(part)]))
+            start += len(part) + 1
+
+        def texts_matching(pattern):
+            return {bisect_right(ends, match.start()) for match in pattern.finditer(codes)}
+
+        slow = texts_matching(_SLOW_CODES)
+        idioms = texts_matching(_IDIOM_PAIR)
+        slow.update(k for k in idioms if not _HITS.isdisjoint(parts[k]))
+
+        c_incr = self.c_incr
+        for k in texts_matching(_CAPS_HIT):
+            if k in slow or not parts[k].strip(_CAPS_CODES):
+                continue
+            # an ALL-CAPS hit next to other words gets the caps bonus
+            total = 0
+            for value, code in zip(values[starts[k]:ends[k]], parts[k]):
+                if code in _CAPS_HITS:
+                    value = value + c_incr if value > 0 else value - c_incr
+                total += value
+            sums[k] = total
+
+        for k in slow:
+            words = [info for token in batch[k].split() for info in self._features_of[token]]
+            sums[k] = self._valence_sum(words, k in idioms)
+
+        # a score only depends on the sum and the "!" / "?" counts, and few
+        # distinct combinations occur: squash each once
+        for text, sum_s in zip(batch, sums):
+            if sum_s:
+                scores[text] = self._squashed[sum_s, text.count("!"), text.count("?")]
+            else:
+                scores[text] = 0.0   # punctuation only amplifies a non-zero sum
+        return scores
+
+    # -----------------------------------------------------
+    # Batch API
+    # -----------------------------------------------------
+    def compound_scores(self, texts):
+        """Return one compound score per text (0.0 for non-strings)."""
+        texts = list(texts)
+        with self._lock:
+            cache = self._texts
+            scores = {}
+            todo = []
+            for text in dict.fromkeys(text for text in texts if isinstance(text, str)):
+                if text in cache:
+                    scores[text] = cache[text]
+                else:
+                    todo.append(text)
+            if todo:
+                fresh = self._score_batch(todo)
+                if len(cache) + len(fresh) > TEXT_CACHE_SIZE:
+                    cache.clear()
+                cache.update(fresh)
+                scores.update(fresh)
+        return [scores[text] if isinstance(text, str) else 0.0 for text in texts]
+
+
+class _Memo(dict):
+    """key → compute(key), computed on first use; starts over past TOKEN_CACHE_SIZE."""
+
+    def __init__(self, compute):
+        super().__init__()
+        self.compute = compute
+
+    def __missing__(self, key):
+        if len(self) >= TOKEN_CACHE_SIZE:
+            self.clear()
+        value = self[key] = self.compute(key)
+        return value
+
+
+class _TokenTable(dict):
+    """raw token → one of the values BatchSentiment._learn() derives for it."""
+
+    def __init__(self, learn):
+        super().__init__()
+        self.learn = learn
+
+    def __missing__(self, token):
+        self.learn(token)
+        return self[token]
@@ -0,0 +1,203 @@
+# =========================================================
+# modules/sentiment/parity.py
+# Parity + throughput check: BatchSentiment vs vaderSentiment
+#
+#   python -m modules.sentiment.parity            # 50 000 texts
+#   python -m modules.sentiment.parity -n 200000
+# Exits non-zero if any compound score differs by more than --tolerance.
+# =========================================================
+import argparse
+import random
+import sys
+import time
+
+from modules.sentiment.batch import BatchSentiment
+
+# Hand-picked cases covering every VADER rule (most from VADER's own demo)
+FIXED_CASES = [
+    "VADER is smart, handsome, and funny.",
+    "VADER is smart, handsome, and funny!",
+    "VADER is very smart, handsome, and funny.",
+    "VADER is VERY SMART, handsome, and FUNNY.",
+    "VADER is VERY SMART, handsome, and FUNNY!!!",
+    "VADER is VERY SMART, uber handsome, and FRIGGIN FUNNY!!!",
+    "VADER is not smart, handsome, nor funny.",
+    "The book was good.",
+    "At least it isn't a horrible book.",
+    "The book was only kind of good.",
+    "The plot was good, but the characters are uncompelling and the dialog is not great.",
+    "Today SUX!",
+    "Today only kinda sux! But I'll get by, lol",
+    "Make sure you :) or :D today!",
+    "Catch utf-8 emoji such as 💘 and 💋 and 😁",
+    "Not bad at all",
+    "Sentiment analysis has never been good.",
+    "Sentiment analysis has never been this good!",
+    "Most automated sentiment analysis tools are shit.",
+    "With VADER, sentiment analysis is the shit!",
+    "Other sentiment analysis tools can be quite bad.",
+    "On the other hand, VADER is quite bad ass",
+    "VADER is such a badass!",
+    "Without a doubt, excellent idea.",
+    "Roger Dodger is one of the most compelling variations on this theme.",
+    "Roger Dodger is at least compelling as a variation on the theme.",
+    "Roger Dodger is one of the least compelling variations on this theme.",
+    "Not such a badass after all.",
+    "Without a doubt, an excellent idea.",
+    "no good no bad no or nor love",
+    "I need this!", "Buying one now!", "So cute, must have 😍", "take my money!!!!!",
+    "is this worth it??", "what??? really????", "", "   ", "🔥🔥🔥", "😍😍 love it",
+    "game 🔛 tonight, so good", "level🆙 :)",
+]
+
+FILLER = ["the", "it", "this", "a", "i", "was", "is", "my", "and", "of", "to",
+          "blender", "mirror", "product", "at", "very", "kind", "sort", "or", "nor"]
+MODIFIERS = ["very", "so", "extremely", "kinda", "sort of", "kind of", "barely", "not",
+             "never", "isn't", "no", "without", "doubt", "least", "but", "BUT", "the",
+             "bad ass", "to die for", "yeah right", "hardly", "VERY", "uber"]
+PUNCT = ["", "", "", "!", "!!", "!!!!!", "?", "??", "????", ".", ",", ":)", ":(", " :D"]
+EMOJI = ["😍", "🔥", "💘", "😭", "👍", "💩", "🙃"]
+
+
+def make_corpus(n, seed=7):
+    """Random captions mixing lexicon words with every modifier VADER knows about."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    rng = random.Random(seed)
+    lexicon = sorted(SentimentIntensityAnalyzer().lexicon)
+    corpus = list(FIXED_CASES)
+    while len(corpus) < n:
+        words = []
+        for _ in range(rng.randint(1, 14)):
+            roll = rng.random()
+            if roll < 0.35:
+                word = rng.choice(lexicon)
+            elif roll < 0.6:
+                word = rng.choice(MODIFIERS)
+            elif roll < 0.65:
+                word = rng.choice(EMOJI)
+            else:
+                word = rng.choice(FILLER)
+            if rng.random() < 0.1:
+                word = word.upper()
+            words.append(word + rng.choice(PUNCT))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+CAPTION_WORDS = ["i", "need", "this", "it", "omg", "where", "link", "buy", "buying", "got",
+                 "mine", "just", "ordered", "one", "for", "my", "mom", "sister", "kitchen",
+                 "room", "now", "want", "the", "blender", "mirror", "curler", "does", "work",
+                 "how", "much", "tiktok", "made", "me", "it's", "you", "literally", "take",
+                 "money", "must", "have", "in", "cart", "added", "shop", "run", "again"]
+CAPTION_LEXICON = ["love", "cute", "amazing", "obsessed", "perfect", "best", "great", "wow",
+                   "lol", "worth", "fun", "beautiful", "happy", "sad", "waste", "scam", "fake",
+                   "bad", "broke", "awesome", "nice", "cool", "want", "need", "like", "yes"]
+
+
+def make_captions(n, seed=11):
+    """TikTok-style comments: short, emoji-heavy, sparse in lexicon words, often repeated."""
+    rng = random.Random(seed)
+    captions = []
+    while len(captions) < n:
+        if captions and rng.random() < 0.3:
+            captions.append(rng.choice(captions))   # popular comments recur
+            continue
+        words = []
+        for _ in range(rng.randint(2, 10)):
+            roll = rng.random()
+            if roll < 0.2:
+                words.append(rng.choice(CAPTION_LEXICON))
+            elif roll < 0.25:
+                words.append(rng.choice(MODIFIERS))
+            else:
+                words.append(rng.choice(CAPTION_WORDS))
+        caption = " ".join(words) + rng.choice(PUNCT)
+        if rng.random() < 0.4:
+            caption += " " + rng.choice(EMOJI) * rng.randint(1, 3)
+        captions.append(caption)
+    return captions
+
+
+def make_runs(n, seed=5):
+    """One leaderboard run: items with 3–20 captions each, about <n> captions in all."""
+    rng = random.Random(seed)
+    captions = make_captions(n, seed)
+    runs, start = [], 0
+    while start < len(captions):
+        size = rng.randint(3, 20)
+        runs.append(captions[start:start + size])
+        start += size
+    return runs
+
+
+def _run_throughput(label, text_lists, reference, engine):
+    """Per-item averages, the way modules/pipeline.py scores a run."""
+    started = time.perf_counter()
+    for texts in text_lists:
+        sum(reference.polarity_scores(text)["compound"] for text in texts)
+    ref_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scores = engine.compound_scores([text for texts in text_lists for text in texts])
+    start = 0
+    for texts in text_lists:
+        sum(scores[start:start + len(texts)])
+        start += len(texts)
+    batch_seconds = time.perf_counter() - started
+    count = sum(len(texts) for texts in text_lists)
+    print(f"   {label:<28} vader {count / ref_seconds:10,.0f}/s   "
+          f"batch {count / batch_seconds:10,.0f}/s   (×{ref_seconds / batch_seconds:.1f})")
+
+
+def _throughput(label, corpus, reference, engine):
+    started = time.perf_counter()
+    for text in corpus:
+        reference.polarity_scores(text)
+    ref_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.compound_scores(corpus)
+    batch_seconds = time.perf_counter() - started
+    print(f"   {label:<28} vader {len(corpus) / ref_seconds:10,.0f}/s   "
+          f"batch {len(corpus) / batch_seconds:10,.0f}/s   (×{ref_seconds / batch_seconds:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BatchSentiment parity check")
+    parser.add_argument("-n", type=int, default=50_000, help="corpus size")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    corpus = make_corpus(args.n) + make_captions(args.n)
+    reference = SentimentIntensityAnalyzer()
+    engine = BatchSentiment()
+
+    expected = [reference.polarity_scores(t)["compound"] for t in corpus]
+    actual = engine.compound_scores(corpus)
+
+    mismatches = [
+        (text, want, got) for text, want, got in zip(corpus, expected, actual)
+        if abs(want - got) > args.tolerance
+    ]
+    worst = max(abs(w - g) for w, g in zip(expected, actual))
+
+    print(f"📚 {len(corpus):,} texts, max |Δ| = {worst:.6f}, {len(mismatches)} over {args.tolerance}")
+    for text, want, got in mismatches[:10]:
+        print(f"   ✗ {text!r}: vader {want} vs batch {got}")
+
+    print("⏱  throughput (texts per second)")
+    _throughput("rule stress corpus", make_corpus(args.n, seed=1), reference, BatchSentiment())
+    captions = make_captions(args.n, seed=2)
+    warm = BatchSentiment()
+    _throughput("captions, first run", captions, reference, warm)
+    _throughput("captions, next hourly run", captions, reference, warm)
+    _throughput("new captions, known words", make_captions(args.n, seed=3), reference, warm)
+    _run_throughput("leaderboard run, cold", make_runs(args.n), reference, BatchSentiment())
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+# =========================================================
+# modules/sketches.py
+# Bounded-memory streaming sketches for caption vocabulary
+# =========================================================
+import hashlib
+import heapq
+import math
+import re
+import struct
+import zlib
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+from modules.text_analysis import INTENT_KEYWORDS, clean_text
+
+SKETCH_DIR = Path("data/sketches")
+MAX_NGRAM = 3
+
+_MAGIC = b"TBSK1"
+
+
+def _hash64(value: str, seed: int = 0) -> int:
+    """Stable 64-bit hash (Python's hash() is salted per process)."""
+    digest = hashlib.blake2b(
+        value.encode("utf-8"), digest_size=8, salt=seed.to_bytes(8, "little")
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def extract_phrases(text: str, max_n: int = MAX_NGRAM):
+    """Return the 1..max_n word phrases found in one caption."""
+    words = clean_text(text).split()
+    phrases = []
+    for n in range(1, max_n + 1):
+        for i in range(len(words) - n + 1):
+            phrases.append(" ".join(words[i:i + n]))
+    return phrases
+
+# =========================================================
+#  Count-Min sketch – approximate phrase frequencies
+# =========================================================
+class CountMinSketch:
+    """
+    Fixed-size frequency table. Estimates never undercount; the
+    overcount is at most ~e/width of the total stream with high probability.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = array("Q", bytes(8 * width * depth))
+
+    def _cells(self, key: str):
+        h = _hash64(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1):
+        for cell in self._cells(key):
+            self.table[cell] += count
+        self.total += count
+
+    def estimate(self, key: str) -> int:
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def merge(self, other: "CountMinSketch"):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different shape.")
+        for i, value in enumerate(other.table):
+            self.table[i] += value
+        self.total += other.total
+
+    def to_bytes(self) -> bytes:
+        return struct.pack("<IIQ", self.width, self.depth, self.total) + self.table.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        width, depth, total = struct.unpack_from("<IIQ", data)
+        sketch = cls(width, depth)
+        sketch.total = total
+        sketch.table = array("Q")
+        sketch.table.frombytes(data[16:])
+        return sketch
+
+# =========================================================
+#  Space-Saving – top-K heavy hitters
+# =========================================================
+class SpaceSaving:
+    """
+    Tracks the (approximately) k most frequent keys in O(k) memory.
+    Each entry stores (count, error); count - error is a guaranteed lower bound.
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # lazy (count, key) min-heap; stale entries are skipped
+
+    def _push(self, key):
+        heapq.heappush(self._heap, (self.counts[key], key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c, k) for k, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while self._heap:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+        key = min(self.counts, key=self.counts.get)
+        return key, self.counts[key]
+
+    def add(self, key: str, count: int = 1):
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.k:
+            self.counts[key] = count
+            self.errors[key] = 0
+        else:
+            victim, floor = self._pop_min()
+            del self.counts[victim]
+            del self.errors[victim]
+            self.counts[key] = floor + count
+            self.errors[key] = floor
+        self._push(key)
+
+    def top(self, limit: int = 10):
+        """Return [(key, count)] sorted by estimated count."""
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+    def merge(self, other: "SpaceSaving"):
+        # Mergeable summaries: sum counts, keep the k largest.
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+            self.errors[key] = self.errors.get(key, 0) + other.errors.get(key, 0)
+        if len(self.counts) > self.k:
+            keep = heapq.nlargest(self.k, self.counts, key=self.counts.get)
+            self.counts = {key: self.counts[key] for key in keep}
+            self.errors = {key: self.errors[key] for key in keep}
+        self._heap = [(c, k) for k, c in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def to_bytes(self) -> bytes:
+        parts = [struct.pack("<II", self.k, len(self.counts))]
+        for key, count in self.counts.items():
+            raw = key.encode("utf-8")
+            parts.append(struct.pack("<QQH", count, self.errors[key], len(raw)) + raw)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpaceSaving":
+        k, n = struct.unpack_from("<II", data)
+        tracker = cls(k)
+        offset = 8
+        for _ in range(n):
+            count, error, size = struct.unpack_from("<QQH", data, offset)
+            offset += 18
+            key = data[offset:offset + size].decode("utf-8")
+            offset += size
+            tracker.counts[key] = count
+            tracker.errors[key] = error
+        tracker._heap = [(c, key) for key, c in tracker.counts.items()]
+        heapq.heapify(tracker._heap)
+        return tracker
+
+# =========================================================
+#  HyperLogLog – distinct counts
+# =========================================================
+class HyperLogLog:
+    """Distinct-count estimator; p=12 gives ~1.6 % error in 4 KB."""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, key: str):
+        h = _hash64(key, seed=1)
+        index = h >> (64 - self.p)
+        rest = (h << self.p) & 0xFFFFFFFFFFFFFFFF
+        rank = 64 - rest.bit_length() + 1 if rest else 64 - self.p + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def merge(self, other: "HyperLogLog"):
+        if self.p != other.p:
+            raise ValueError("Cannot merge HyperLogLogs of different precision.")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def to_bytes(self) -> bytes:
+        return struct.pack("<B", self.p) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        hll = cls(data[0])
+        hll.registers = bytearray(data[1:])
+        return hll
+
+# =========================================================
+#  Caption sketch – the bundle we persist per hour
+# =========================================================
+class CaptionSketch:
+    """Phrase frequencies, heavy hitters and distinct counts for one window."""
+
+    def __init__(self):
+        self.phrases = CountMinSketch()
+        self.top = SpaceSaving()
+        self.distinct_phrases = HyperLogLog()
+        self.distinct_commenters = HyperLogLog()
+
+    def add_texts(self, texts):
+        for text in texts or []:
+            if not isinstance(text, str):
+                continue
+            for phrase in extract_phrases(text):
+                self.phrases.add(phrase)
+                self.top.add(phrase)
+                self.distinct_phrases.add(phrase)
+
+    def add_commenters(self, commenters):
+        for commenter in commenters or []:
+            self.distinct_commenters.add(str(commenter))
+
+    def merge(self, other: "CaptionSketch"):
+        self.phrases.merge(other.phrases)
+        self.top.merge(other.top)
+        self.distinct_phrases.merge(other.distinct_phrases)
+        self.distinct_commenters.merge(other.distinct_commenters)
+
+    def to_bytes(self) -> bytes:
+        sections = [
+            self.phrases.to_bytes(),
+            self.top.to_bytes(),
+            self.distinct_phrases.to_bytes(),
+            self.distinct_commenters.to_bytes(),
+        ]
+        body = b"".join(struct.pack("<I", len(s)) + s for s in sections)
+        return _MAGIC + zlib.compress(body, 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CaptionSketch":
+        if not data.startswith(_MAGIC):
+            raise ValueError("Not a caption sketch file.")
+        body = zlib.decompress(data[len(_MAGIC):])
+        sections, offset = [], 0
+        while offset < len(body):
+            (size,) = struct.unpack_from("<I", body, offset)
+            offset += 4
+            sections.append(body[offset:offset + size])
+            offset += size
+        sketch = cls()
+        sketch.phrases = CountMinSketch.from_bytes(sections[0])
+        sketch.top = SpaceSaving.from_bytes(sections[1])
+        sketch.distinct_phrases = HyperLogLog.from_bytes(sections[2])
+        sketch.distinct_commenters = HyperLogLog.from_bytes(sections[3])
+        return sketch
+
+# =========================================================
+#  Hourly persistence
+# =========================================================
+def _hour_path(when: datetime) -> Path:
+    return SKETCH_DIR / f"captions_{when:%Y-%m-%d_%H}.bin"
+
+
+@contextmanager
+def _write_lock():
+    """
+    Exclusive lock around an hourly sketch's read-modify-write. The worker
+    and the bot (hourly run, !trends) may record captions at the same time.
+    """
+    with open(SKETCH_DIR / "record.lock", "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def load_sketch(path: Path) -> CaptionSketch:
+    """Load a sketch file, or return an empty sketch if it is missing/corrupt."""
+    try:
+        return CaptionSketch.from_bytes(path.read_bytes())
+    except Exception:
+        return CaptionSketch()
+
+
+def record_captions(entries, when: datetime = None):
+    """
+    Fold one run's raw trend entries into the current hour's sketch.
+    Entries are the dicts returned by the source loader; an optional
+    'commenters' list feeds the distinct-commenter estimate.
+    """
+    when = when or datetime.now()
+    SKETCH_DIR.mkdir(parents=True, exist_ok=True)
+    path = _hour_path(when)
+    with _write_lock():
+        sketch = load_sketch(path)
+        for entry in entries:
+            sketch.add_texts(entry.get("caption_texts", []))
+            sketch.add_commenters(entry.get("commenters", []))
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(sketch.to_bytes())
+        tmp.replace(path)   # readers never see a half-written file
+    return sketch
+
+
+def merge_window(hours: int = 24, end: datetime = None) -> CaptionSketch:
+    """Merge the hourly sketches covering the <hours> before <end>."""
+    end = end or datetime.now()
+    merged = CaptionSketch()
+    for h in range(hours):
+        path = _hour_path(end - timedelta(hours=h))
+        if path.exists():
+            merged.merge(load_sketch(path))
+    return merged
+
+
+def surging_phrases(hours: int = 24, limit: int = 10, min_count: int = 3):
+    """
+    Return [(phrase, recent_count, growth)] for heavy hitters of the last
+    <hours>, ranked by growth against the preceding window of equal length.
+    """
+    now = datetime.now()
+    recent = merge_window(hours, now)
+    baseline = merge_window(hours, now - timedelta(hours=hours))
+    # Normalise by stream size so a quiet baseline hour doesn't inflate growth.
+    scale = max(1, recent.phrases.total) / max(1, baseline.phrases.total)
+
+    results = []
+    for phrase, count in recent.top.top(recent.top.k):
+        if count < min_count:
+            continue
+        before = baseline.phrases.estimate(phrase) * scale
+        growth = round(count / max(1.0, before), 2)
+        results.append((phrase, count, growth))
+    results.sort(key=lambda r: (r[2], r[1]), reverse=True)
+    return results[:limit]
+
+
+def suggest_intent_phrases(hours: int = 24 * 7, limit: int = 10):
+    """Return frequent multi-word phrases not yet covered by INTENT_KEYWORDS."""
+    patterns = [re.compile(p) for p in INTENT_KEYWORDS]
+    sketch = merge_window(hours)
+    suggestions = []
+    for phrase, count in sketch.top.top(sketch.top.k):
+        if " " not in phrase or any(p.search(phrase) for p in patterns):
+            continue
+        suggestions.append((phrase, count))
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+# =========================================================
+#  Stand‑alone test  →  python ‑m modules.sketches
+# =========================================================
+if __name__ == "__main__":
+    sketch = CaptionSketch()
+    sketch.add_texts(["I need this blender!", "Need this ASAP", "take my money, need this"])
+    sketch.add_commenters(["a", "b", "a"])
+    restored = CaptionSketch.from_bytes(sketch.to_bytes())
+    print("Top phrases:", restored.top.top(5))
+    print("'need this' ≈", restored.phrases.estimate("need this"))
+    print("Distinct phrases ≈", restored.distinct_phrases.count())
+    print("Distinct commenters ≈", restored.distinct_commenters.count())
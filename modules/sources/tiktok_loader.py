@@ -2,6 +2,7 @@
 # modules/sources/tiktok_loader.py
 # =========================================================
 import json
+import logging
 from pathlib import Path
 
 def get_latest_trends():
@@ -12,14 +13,14 @@ def get_latest_trends():
     try:
         file_path = Path("data/trends.json")
         if not file_path.exists():
-            print("⚠️  trends.json not found – returning empty list.")
+            logging.warning("⚠️  trends.json not found – returning empty list.")
             return []
         with file_path.open("r", encoding="utf-8") as f:
             data = json.load(f)
             if isinstance(data, list):
                 return data
-            print("⚠️  trends.json does not contain a list.")
+            logging.warning("⚠️  trends.json does not contain a list.")
             return []
     except Exception as e:
-        print("⚠️  Error loading trends.json:", e)
+        logging.warning("⚠️  Error loading trends.json: %s", e)
         return []
\ No newline at end of file
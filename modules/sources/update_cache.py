@@ -2,7 +2,7 @@
 # modules/sources/update_cache.py
 # =========================================================
 import json
-from datetime import datetime
+import logging
 from modules.sources.tiktok_loader import get_latest_trends
 
 
@@ -16,6 +16,6 @@ def update_local_cache():
         data = get_latest_trends()
         with open("data/trends_cache.json", "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"🗂  Local cache updated at {datetime.now():%Y-%m-%d %H:%M}")
+        logging.info("🗂  Local cache updated (%d entries)", len(data))
     except Exception as e:
-        print("⚠️  Unable to update cache:", e)
\ No newline at end of file
+        logging.warning("⚠️  Unable to update cache: %s", e)
\ No newline at end of file
@@ -0,0 +1,101 @@
+# =========================================================
+# modules/subscriptions.py
+# Registry of which guild channels receive which feeds
+# =========================================================
+import sqlite3
+from dataclasses import dataclass
+
+from modules.database import DB_PATH
+
+FEEDS = ("hourly", "daily", "alerts")
+MAX_ITEMS = 25   # Discord rejects embeds with more fields than this
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """One channel's subscription to one feed, with its display filters."""
+    guild_id: int
+    channel_id: int
+    feed: str
+    min_score: float = 0.0     # hide items scoring below this
+    max_items: int = 10        # cap leaderboard length
+
+    @property
+    def filter_key(self):
+        """Channels sharing this key can be sent the very same embed."""
+        return (self.min_score, self.max_items)
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            feed TEXT NOT NULL,
+            min_score REAL DEFAULT 0,
+            max_items INTEGER DEFAULT 10,
+            PRIMARY KEY (channel_id, feed)
+        )
+    """)
+    return conn
+
+
+def subscribe(guild_id, channel_id, feed="hourly", min_score=0.0, max_items=10):
+    """Add or update a channel's subscription to <feed>."""
+    if feed not in FEEDS:
+        raise ValueError(f"Unknown feed '{feed}'. Choose from: {', '.join(FEEDS)}")
+    if min_score < 0:
+        raise ValueError("min_score can't be negative.")
+    if not 1 <= max_items <= MAX_ITEMS:
+        raise ValueError(f"max_items must be between 1 and {MAX_ITEMS}.")
+    conn = _connect()
+    conn.execute(
+        "INSERT INTO subscriptions (guild_id, channel_id, feed, min_score, max_items) "
+        "VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(channel_id, feed) DO UPDATE SET "
+        "min_score=excluded.min_score, max_items=excluded.max_items",
+        (guild_id, channel_id, feed, float(min_score), int(max_items)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def unsubscribe(channel_id, feed=None):
+    """Remove one feed (or all feeds) from a channel; return rows removed."""
+    conn = _connect()
+    if feed:
+        cur = conn.execute(
+            "DELETE FROM subscriptions WHERE channel_id=? AND feed=?", (channel_id, feed)
+        )
+    else:
+        cur = conn.execute("DELETE FROM subscriptions WHERE channel_id=?", (channel_id,))
+    conn.commit()
+    conn.close()
+    return cur.rowcount
+
+
+def list_subscriptions(feed=None, guild_id=None):
+    """Return Subscription objects, optionally filtered by feed and/or guild."""
+    sql = "SELECT guild_id, channel_id, feed, min_score, max_items FROM subscriptions"
+    clauses, params = [], []
+    if feed:
+        clauses.append("feed=?")
+        params.append(feed)
+    if guild_id:
+        clauses.append("guild_id=?")
+        params.append(guild_id)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    conn = _connect()
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return [Subscription(*row) for row in rows]
+
+
+def group_by_filter(subscriptions):
+    """Return {filter_key: [channel_id, ...]} so each distinct embed is built once."""
+    groups = {}
+    for sub in subscriptions:
+        groups.setdefault(sub.filter_key, []).append(sub.channel_id)
+    return groups
@@ -0,0 +1,21 @@
+from modules.backfill import parse_report
+
+
+def test_parse_report_skips_truncated_rows(tmp_path):
+    path = tmp_path / "trends_2025-01-01_10-00-00.csv"
+    path.write_text(
+        "Rank,Item,IntentScore,Likes,Comments\n"
+        "1,Mini Blender,0.91,120,14\n"
+        "2,LED Mirr",
+        encoding="utf-8",
+    )
+    name, ts, rows = parse_report(path)
+    assert name == path.name
+    assert ts == "2025-01-01T10:00:00"
+    assert rows == [("Mini Blender", 0.91, 120, 14)]
+
+
+def test_parse_report_rejects_unreadable_file(tmp_path):
+    path = tmp_path / "trends_2025-01-01_10-00-00.csv"
+    path.write_text("Rank,Item,IntentScore\n1,Mini Blender,not-a-number\n", encoding="utf-8")
+    assert parse_report(path) == (path.name, None, [])
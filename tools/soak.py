@@ -0,0 +1,413 @@
+# =========================================================
+# tools/soak.py
+# Load / soak harness: replays weeks of hourly runs of bot.py
+# against a fake Discord gateway on a virtual clock
+#
+#   python tools/soak.py                                # 100 → 20 000 items, 24 h each
+#   python tools/soak.py --sizes 500,5000 --hours 168   # a week per step
+#   python tools/soak.py --interval 30 --json soak.json # overrun = hourly run > 30 s
+#
+# Everything runs in a throwaway working directory (its own data/,
+# trends.db, reports and bot.log); no Discord connection is made.
+# =========================================================
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+WORDS = ["Mini", "LED", "Portable", "Smart", "Magnetic", "Foldable", "Wireless", "Heated",
+         "Glow", "Ultra", "Cordless", "Silicone", "Cloud", "Aesthetic", "Self-Cleaning"]
+NOUNS = ["Blender", "Mirror", "Lamp", "Fan", "Curler", "Projector", "Humidifier", "Massager",
+         "Organizer", "Speaker", "Charger", "Bottle", "Brush", "Kettle", "Scale", "Pillow"]
+CAPTIONS = ["I need this!", "Buying one now 😍", "so cute, must have", "take my money!!!",
+            "does it actually work?", "omg where is the link", "added to cart 🔥",
+            "mine broke after a week", "worth every penny", "TikTok made me buy it",
+            "literally obsessed", "not worth the hype tbh", "ordered two", "how much??"]
+# (command, weight) mix fired by simulated users during each hourly run
+COMMAND_MIX = [("summary", 4), ("topmovers", 4), ("graph", 3), ("compare", 1), ("phrases", 1),
+               ("ping", 2)]
+
+
+# ---------------------------------------------------------
+#  Virtual clock
+# ---------------------------------------------------------
+class VirtualClock:
+    """
+    Replaces `datetime` and `time` inside bot.py and modules/* so that
+    datetime.now() / time.time() follow simulated time. time.monotonic(),
+    time.sleep() etc. stay real, so rate limiting and lag are measured truly.
+    """
+
+    def __init__(self, start: datetime):
+        self.current = start
+
+    def advance(self, delta: timedelta):
+        self.current += delta
+
+    def install(self):
+        import datetime as datetime_module
+        import time as time_module
+
+        clock = self
+
+        class VirtualDatetime(datetime_module.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.current if tz is None else clock.current.astimezone(tz)
+
+        class VirtualTime:
+            def __getattr__(self, name):
+                return getattr(time_module, name)
+
+            def time(self):
+                return clock.current.timestamp()
+
+        patched = 0
+        for name, module in list(sys.modules.items()):
+            if module is None or not (name == "bot" or name.startswith("modules")):
+                continue
+            if getattr(module, "datetime", None) is datetime_module.datetime:
+                module.datetime = VirtualDatetime
+                patched += 1
+            if getattr(module, "time", None) is time_module:
+                module.time = VirtualTime()
+                patched += 1
+        return patched
+
+
+# ---------------------------------------------------------
+#  Fake gateway: channels and command contexts
+# ---------------------------------------------------------
+class FakeChannel:
+    """Stands in for a discord TextChannel; records what the bot sends."""
+
+    def __init__(self, channel_id, gateway):
+        self.id = channel_id
+        self.gateway = gateway
+
+    async def send(self, content=None, **kwargs):
+        if self.gateway.send_latency:
+            await asyncio.sleep(self.gateway.send_latency)
+        self.gateway.record(self.id, content, kwargs)
+
+
+class FakeGateway:
+    def __init__(self, send_latency=0.0):
+        self.send_latency = send_latency
+        self.channels = {}
+        self.messages = 0
+        self.embeds = 0
+        self.files = 0
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def add_channel(self, channel_id):
+        self.channels[channel_id] = FakeChannel(channel_id, self)
+        return self.channels[channel_id]
+
+    def record(self, channel_id, content, kwargs):
+        self.messages += 1
+        if kwargs.get("embed") is not None:
+            self.embeds += 1
+        file = kwargs.get("file")
+        if file is not None:
+            self.files += 1
+            close = getattr(file, "close", None)
+            if close:
+                close()
+
+
+class _Typing:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeGuild:
+    id = 1
+    filesize_limit = 25 * 1024 * 1024
+
+
+class FakeContext:
+    """Minimal commands.Context: enough for every command in bot.py."""
+
+    def __init__(self, gateway, channel):
+        self.gateway = gateway
+        self.channel = channel
+        self.guild = FakeGuild()
+        self.author = "soak-user"
+
+    async def send(self, content=None, **kwargs):
+        await self.channel.send(content, **kwargs)
+
+    def typing(self):
+        return _Typing()
+
+
+# ---------------------------------------------------------
+#  Synthetic data and measurements
+# ---------------------------------------------------------
+def write_trends(count: int, rng: random.Random, path=Path("data/trends.json")):
+    """Write <count> synthetic trend entries where the loader reads them."""
+    entries = []
+    for i in range(count):
+        entries.append({
+            "item_name": f"{WORDS[i % len(WORDS)]} {NOUNS[(i // len(WORDS)) % len(NOUNS)]} {i}",
+            "hashtags": ["#TikTokMadeMeBuyIt"],
+            "caption_texts": rng.sample(CAPTIONS, 3),
+            "view_count": rng.randint(1_000, 2_000_000),
+            "like_count": rng.randint(100, 200_000),
+            "comment_count": rng.randint(10, 20_000),
+            "share_count": rng.randint(0, 10_000),
+            "creator_followers": rng.randint(100, 5_000_000),
+        })
+    path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def dir_size(path: Path):
+    files = [p for p in path.rglob("*") if p.is_file()] if path.exists() else []
+    return len(files), sum(p.stat().st_size for p in files) / 1e6
+
+
+def db_size_mb():
+    return sum(
+        Path(f"data/trends.db{suffix}").stat().st_size
+        for suffix in ("", "-wal") if Path(f"data/trends.db{suffix}").exists()
+    ) / 1e6
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class LagMonitor:
+    """Ticks every <period> seconds and records how late each tick wakes up."""
+
+    def __init__(self, period=0.01):
+        self.period = period
+        self.lags = []
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.period
+            await asyncio.sleep(self.period)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def take(self):
+        lags, self.lags = self.lags, []
+        return lags
+
+
+# ---------------------------------------------------------
+#  Harness
+# ---------------------------------------------------------
+async def fire_commands(bot_module, gateway, channel, count, spread, rng, item_names, latencies):
+    """Start <count> user commands at random moments within <spread> seconds."""
+    names, weights = zip(*COMMAND_MIX)
+
+    async def one(delay):
+        await asyncio.sleep(delay)
+        name = rng.choices(names, weights)[0]
+        # !graph / !compare take their items as keyword-only "rest of message" arguments
+        kwargs = {}
+        if name == "graph" and item_names:
+            kwargs = {"item": rng.choice(item_names)}
+        elif name == "compare" and item_names:
+            kwargs = {"items": ", ".join(rng.sample(item_names, min(3, len(item_names))))}
+        command = bot_module.bot.get_command(name)
+        started = time.perf_counter()
+        try:
+            await command.callback(FakeContext(gateway, channel), **kwargs)
+        except Exception as e:
+            print(f"   ⚠️ !{name} failed: {e}")
+        latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(rng.uniform(0, spread)) for _ in range(count)))
+
+
+async def run_step(bot_module, clock, gateway, channel, size, args, rng):
+    """Replay args.hours hourly runs at <size> items; return the step's metrics."""
+    write_trends(size, rng)
+    item_names = [f"{WORDS[i % len(WORDS)]} {NOUNS[(i // len(WORDS)) % len(NOUNS)]} {i}"
+                  for i in range(min(size, 50))]
+    monitor = LagMonitor()
+    monitor.start()
+    rss_start = rss_mb()
+    runs, latencies = [], {}
+
+    for hour in range(args.hours):
+        clock.advance(timedelta(hours=1))
+        started = time.perf_counter()
+        hourly = asyncio.create_task(bot_module.hourly_update.coro())
+        await asyncio.gather(
+            hourly,
+            fire_commands(bot_module, gateway, channel, args.users, args.spread, rng,
+                          item_names, latencies),
+        )
+        runs.append(time.perf_counter() - started)
+        if clock.current.hour == 0:
+            await bot_module.daily_report.coro()
+        if clock.current.hour % 6 == 0:
+            await bot_module.retention_job.coro()
+
+    lags = monitor.take()
+    monitor.task.cancel()
+    report_files, report_mb = dir_size(Path("data/reports"))
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        "items": size,
+        "hourly_runs": len(runs),
+        "run_p50_s": statistics.median(runs),
+        "run_p95_s": pct(runs, 95),
+        "run_max_s": max(runs),
+        "overruns": sum(1 for r in runs if r > args.interval),
+        "loop_lag_p99_ms": pct(lags, 99) * 1000,
+        "loop_lag_max_ms": max(lags, default=0.0) * 1000,
+        "cmd_p50_ms": pct(all_latencies, 50) * 1000,
+        "cmd_p95_ms": pct(all_latencies, 95) * 1000,
+        "cmd_p99_ms": pct(all_latencies, 99) * 1000,
+        "cmd_p95_by_name_ms": {k: round(pct(v, 95) * 1000, 1) for k, v in latencies.items()},
+        "rss_growth_mb": rss_mb() - rss_start,
+        "rss_mb": rss_mb(),
+        "db_mb": db_size_mb(),
+        "report_files": report_files,
+        "report_mb": report_mb,
+    }
+
+
+def projected_overrun(steps, interval):
+    """Item count at which the p95 hourly run reaches <interval> (least-squares line)."""
+    if len(steps) < 2:
+        return None
+    xs = [s["items"] for s in steps]
+    ys = [s["run_p95_s"] for s in steps]
+    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if not var:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+    if slope <= 0:
+        return None
+    return int((interval - (mean_y - slope * mean_x)) / slope)
+
+
+def print_step(step):
+    print(
+        f"📈 {step['items']:>7,} items │ hourly p50 {step['run_p50_s']:6.2f}s "
+        f"p95 {step['run_p95_s']:6.2f}s max {step['run_max_s']:6.2f}s "
+        f"overruns {step['overruns']} │ loop lag p99 {step['loop_lag_p99_ms']:6.1f} ms "
+        f"max {step['loop_lag_max_ms']:6.1f} ms │ cmd p50/p95/p99 "
+        f"{step['cmd_p50_ms']:.0f}/{step['cmd_p95_ms']:.0f}/{step['cmd_p99_ms']:.0f} ms │ "
+        f"RSS {step['rss_mb']:.0f} MB (+{step['rss_growth_mb']:.1f}) │ DB {step['db_mb']:.1f} MB │ "
+        f"reports {step['report_files']:,} files {step['report_mb']:.1f} MB"
+    )
+
+
+async def soak(args):
+    rng = random.Random(args.seed)
+    from modules.logs import setup_logging
+    setup_logging("bot.log", console=False)     # bot.py's own call is then a no-op
+    import bot as bot_module            # imported inside the scratch directory
+    from modules.database import init_db
+    from modules.subscriptions import subscribe
+
+    clock = VirtualClock(datetime.now().replace(minute=0, second=0, microsecond=0))
+    clock.install()
+    gateway = FakeGateway(args.send_latency)
+    bot_module.scheduler.get_channel = gateway.get_channel
+
+    init_db()
+    for i in range(args.channels):
+        channel = gateway.add_channel(1000 + i)
+        for feed in ("hourly", "daily", "alerts"):
+            subscribe(1, channel.id, feed)
+    command_channel = gateway.add_channel(999)
+
+    steps = []
+    for size in args.sizes:
+        step = await run_step(bot_module, clock, gateway, command_channel, size, args, rng)
+        steps.append(step)
+        print_step(step)
+
+    projection = projected_overrun(steps, args.interval)
+    first_overrun = next((s["items"] for s in steps if s["overruns"]), None)
+    print(f"📨 fake gateway: {gateway.messages:,} messages, {gateway.embeds:,} embeds, "
+          f"{gateway.files:,} files")
+    if first_overrun:
+        print(f"🚨 hourly run overran its {args.interval:g}s interval at {first_overrun:,} items")
+    if projection:
+        print(f"🔮 projected overrun (p95 = {args.interval:g}s) at ≈ {projection:,} items")
+    return {"steps": steps, "first_overrun_items": first_overrun, "projected_overrun_items": projection}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrendingBot load / soak harness")
+    parser.add_argument("--sizes", default="100,1000,5000,20000",
+                        help="comma-separated item counts, one scale step each")
+    parser.add_argument("--hours", type=int, default=24, help="virtual hours per step")
+    parser.add_argument("--users", type=int, default=20, help="commands fired per hourly run")
+    parser.add_argument("--spread", type=float, default=1.0,
+                        help="seconds over which each hour's commands arrive")
+    parser.add_argument("--channels", type=int, default=10, help="subscribed fake channels")
+    parser.add_argument("--send-latency", type=float, default=0.0,
+                        help="simulated Discord API latency per send (s)")
+    parser.add_argument("--interval", type=float, default=3600.0,
+                        help="real budget of one hourly run (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the metrics to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    args = parser.parse_args()
+    args.sizes = [int(s) for s in args.sizes.split(",")]
+
+    workdir = Path(tempfile.mkdtemp(prefix="trendingbot-soak-"))
+    (workdir / "data").mkdir()
+    if (ROOT / "data" / "config.json").exists():
+        shutil.copy(ROOT / "data" / "config.json", workdir / "data" / "config.json")
+    json_path = Path(args.json).resolve() if args.json else None
+    sys.path.insert(0, str(ROOT))
+    os.chdir(workdir)
+    print(f"🧪 soak run in {workdir}")
+
+    try:
+        results = asyncio.run(soak(args))
+        if json_path:
+            json_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    finally:
+        os.chdir(ROOT)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
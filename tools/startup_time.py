@@ -0,0 +1,70 @@
+# =========================================================
+# tools/startup_time.py
+# Reproducible import-to-ready timing for the bot process
+#
+#   python tools/startup_time.py              # time `import bot`
+#   python tools/startup_time.py -n 20 modules.scoring
+# =========================================================
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_TIMER = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def time_import(module: str, runs: int):
+    """Import <module> in <runs> fresh interpreters and return the timings (s)."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    timings = []
+    # one untimed run so every measured run sees warm .pyc files
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, env=env,
+                   capture_output=True)
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(module=module)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def slowest_imports(module: str, limit: int):
+    """Return [(cumulative_us, name)] for the heaviest imports via -X importtime."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("module", nargs="?", default="bot")
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = time_import(args.module, args.runs)
+    print(f"⏱  import {args.module} over {args.runs} runs")
+    print(f"   min {min(timings) * 1000:.1f} ms  "
+          f"median {statistics.median(timings) * 1000:.1f} ms  "
+          f"max {max(timings) * 1000:.1f} ms")
+
+    print(f"\n🐢 {args.top} heaviest imports (cumulative):")
+    for cumulative, name in slowest_imports(args.module, args.top):
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
@@ -0,0 +1,83 @@
+# =========================================================
+# TikTok Trend Finder – ingest / scoring worker
+#
+# Runs ingest → score → persist on its own schedule and queues each
+# finished leaderboard for the Discord process (TRENDINGBOT_MODE=split).
+#
+#   python worker.py                  # every hour, single process scoring
+#   python worker.py --processes 4    # score with a 4-process pool
+#   python worker.py --once           # one cycle, then exit
+# =========================================================
+import argparse
+import logging
+import os
+import socket
+import time
+
+from modules.breakout import BreakoutDetector
+from modules.database import init_db, save_trends
+from modules.leaderboard_queue import acquire_lease, publish
+from modules.logs import log_run, setup_logging, stage
+from modules.movement import load_last_scores, compare_movement
+from modules.pipeline import load_scored_items
+from modules.report import save_report
+
+setup_logging("worker.log")
+
+LEASE_NAME = "leaderboard_cycle"
+
+
+def run_cycle(processes: int = 1):
+    """One full ingest → score → persist → publish pass."""
+    started = time.monotonic()
+    with stage("ingest_score", processes=processes) as timing:
+        items, error = load_scored_items(processes)
+        timing["items"] = len(items)
+    movement_icons = compare_movement(items, load_last_scores())
+
+    breakouts = []
+    if not error:
+        with stage("save_report"):
+            save_report(items)
+        with stage("save_trends"):
+            save_trends(items)
+        with stage("breakouts"):
+            detector = BreakoutDetector.load()
+            breakouts = detector.update(items)
+            detector.save()
+
+    queue_id = publish(items, movement_icons, breakouts, error)
+    logging.info(
+        "Cycle %d done: %d items, %d breakouts in %.2fs",
+        queue_id, len(items), len(breakouts), time.monotonic() - started,
+    )
+    return queue_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrendingBot ingest/scoring worker")
+    parser.add_argument("--interval", type=int, default=3600, help="seconds between cycles")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="scoring processes per cycle")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args()
+
+    init_db()
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    logging.info("⚙️  Worker %s started (every %ds, %d processes)", owner, args.interval, args.processes)
+
+    while True:
+        # Extra workers stay on standby; whoever holds the lease runs the cycle.
+        if acquire_lease(LEASE_NAME, owner, args.interval * 0.9):
+            try:
+                with log_run("cycle"):
+                    run_cycle(args.processes)
+            except Exception as e:
+                logging.exception("Worker cycle failed: %s", e)
+        if args.once:
+            break
+        time.sleep(args.interval - time.time() % args.interval)
+
+
+if __name__ == "__main__":
+    main()